@@ -20,6 +20,128 @@ class Config:
         print("⚠️  WARNING: GEMINI_API_KEY not set. AI features will be limited.")
         GEMINI_API_KEY = None
     
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-pro")
+    
+    # LLM backend: "gemini", "stub" (in-process) or "stub_http" (llm_stub_server)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+    LLM_STUB_URL = os.getenv("LLM_STUB_URL", "http://127.0.0.1:8100")
+    LLM_STUB_PORT = int(os.getenv("LLM_STUB_PORT", 8100))
+    LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", 1500))
+    LLM_STUB_LATENCY_DISTRIBUTION = os.getenv("LLM_STUB_LATENCY_DISTRIBUTION", "lognormal")
+    LLM_STUB_LATENCY_SPREAD = float(os.getenv("LLM_STUB_LATENCY_SPREAD", 0.5))
+    LLM_STUB_CHUNK_CHARS = int(os.getenv("LLM_STUB_CHUNK_CHARS", 24))
+    LLM_STUB_CHUNK_DELAY_MS = float(os.getenv("LLM_STUB_CHUNK_DELAY_MS", 40))
+    LLM_STUB_ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", 0))
+    LLM_STUB_RESPONSES_FILE = os.getenv("LLM_STUB_RESPONSES_FILE")
+    
+    # LLM client: max in-flight Gemini calls per process and per-call deadlines
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 20))
+    LLM_REPORT_TIMEOUT_SECONDS = float(os.getenv("LLM_REPORT_TIMEOUT_SECONDS", 90))
+    
+    # Process-wide Gemini quota shared by all traffic (0 disables a limit)
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 60))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 250000))
+    
+    # Send one duplicate request when a call runs past this latency percentile
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "False").lower() == "true"
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 0.95))
+    
+    # Circuit breaker: fail fast to fallbacks after repeated LLM failures
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", 5))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+    LLM_BREAKER_PROBE_TIMEOUT_SECONDS = float(os.getenv("LLM_BREAKER_PROBE_TIMEOUT_SECONDS", 10))
+    
+    # Hint cache: entries keyed by question, hint level and normalized code
+    HINT_CACHE_MAX_ENTRIES = int(os.getenv("HINT_CACHE_MAX_ENTRIES", 1024))
+    HINT_CACHE_TTL_SECONDS = float(os.getenv("HINT_CACHE_TTL_SECONDS", 3600))
+    
+    # Prompt token budgets per call type (estimated tokens)
+    PROMPT_BUDGET_RESPONSE = int(os.getenv("PROMPT_BUDGET_RESPONSE", 3000))
+    PROMPT_BUDGET_HINT = int(os.getenv("PROMPT_BUDGET_HINT", 2000))
+    PROMPT_BUDGET_FOLLOW_UP = int(os.getenv("PROMPT_BUDGET_FOLLOW_UP", 2500))
+    PROMPT_BUDGET_REPORT = int(os.getenv("PROMPT_BUDGET_REPORT", 8000))
+    PROMPT_BUDGET_REPORT_SECTION = int(os.getenv("PROMPT_BUDGET_REPORT_SECTION", 3000))
+    PROMPT_SUMMARY_TOKENS = int(os.getenv("PROMPT_SUMMARY_TOKENS", 400))
+    
+    # Pre-generate the level-1 hint and a follow-up question after each analysis
+    SPECULATIVE_PRECOMPUTE = os.getenv("SPECULATIVE_PRECOMPUTE", "False").lower() == "true"
+    SPECULATIVE_MAX_CONCURRENCY = int(os.getenv("SPECULATIVE_MAX_CONCURRENCY", 2))
+    
+    # One structured call per submission for feedback, follow-up and hint ladder
+    COMBINED_GENERATION = os.getenv("COMBINED_GENERATION", "False").lower() == "true"
+    
+    # Stream Gemini output to the client as it is generated
+    STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "True").lower() == "true"
+    
+    # LLM call metrics; prices are USD per million tokens and only feed cost estimates
+    LLM_METRICS_MAX_INTERVIEWS = int(os.getenv("LLM_METRICS_MAX_INTERVIEWS", 1000))
+    LLM_INPUT_COST_PER_MILLION = float(os.getenv("LLM_INPUT_COST_PER_MILLION", 0))
+    LLM_OUTPUT_COST_PER_MILLION = float(os.getenv("LLM_OUTPUT_COST_PER_MILLION", 0))
+    
+    # Background performance report jobs
+    REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 2))
+    REPORT_JOBS_MAX = int(os.getenv("REPORT_JOBS_MAX", 1000))
+    REPORTS_DIR = os.getenv("REPORTS_DIR", "data/reports")
+    
+    # Live interview session state: per-interview caps and idle eviction
+    SESSION_MAX_HISTORY = int(os.getenv("SESSION_MAX_HISTORY", 200))
+    SESSION_MAX_SUBMISSIONS = int(os.getenv("SESSION_MAX_SUBMISSIONS", 50))
+    SESSION_MAX_HINTS = int(os.getenv("SESSION_MAX_HINTS", 50))
+    SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", 3600))
+    SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", 60))
+    
+    # Shared state for multiple workers/nodes: "memory" (single worker) or "redis"
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "codesage:")
+    STATE_SESSION_TTL_SECONDS = float(os.getenv("STATE_SESSION_TTL_SECONDS", 86400))
+    # Longest a state store round trip may take before its connection is dropped
+    STATE_COMMAND_TIMEOUT_SECONDS = float(os.getenv("STATE_COMMAND_TIMEOUT_SECONDS", 5))
+    
+    # Interview records: "sqlite" (local file, survives restarts) or "store" (the state store above)
+    INTERVIEW_BACKEND = os.getenv("INTERVIEW_BACKEND", "sqlite" if STATE_BACKEND == "memory" else "store")
+    INTERVIEW_DB_PATH = os.getenv("INTERVIEW_DB_PATH", "data/interviews.db")
+    # Hot interviews kept in memory, and how queued writes are batched
+    INTERVIEW_CACHE_SIZE = int(os.getenv("INTERVIEW_CACHE_SIZE", 500))
+    INTERVIEW_FLUSH_INTERVAL_MS = float(os.getenv("INTERVIEW_FLUSH_INTERVAL_MS", 50))
+    INTERVIEW_FLUSH_BATCH_SIZE = int(os.getenv("INTERVIEW_FLUSH_BATCH_SIZE", 200))
+    # Interview questions, loaded once at startup
+    QUESTION_BANK_PATH = os.getenv(
+        "QUESTION_BANK_PATH", os.path.join(os.path.dirname(__file__), "data", "questions.json")
+    )
+    # Interview listing page size: default and largest allowed
+    INTERVIEW_PAGE_SIZE = int(os.getenv("INTERVIEW_PAGE_SIZE", 20))
+    INTERVIEW_PAGE_MAX = int(os.getenv("INTERVIEW_PAGE_MAX", 100))
+    # HTTP responses at least this large are gzipped for clients that accept it
+    GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", 1000))
+    
+    # Local append-only log of session history and editor code, used without a shared store
+    EVENT_LOG_ENABLED = os.getenv("EVENT_LOG_ENABLED", "True").lower() == "true"
+    EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "data/events")
+    EVENT_LOG_FSYNC_INTERVAL_SECONDS = float(os.getenv("EVENT_LOG_FSYNC_INTERVAL_SECONDS", 1))
+    # Fold the log into a snapshot after this many records or bytes
+    EVENT_LOG_SNAPSHOT_EVERY = int(os.getenv("EVENT_LOG_SNAPSHOT_EVERY", 500))
+    EVENT_LOG_SNAPSHOT_BYTES = int(os.getenv("EVENT_LOG_SNAPSHOT_BYTES", 4 * 1024 * 1024))
+    
+    # Requests handled concurrently on one WebSocket
+    WS_MAX_CONCURRENT_TASKS = int(os.getenv("WS_MAX_CONCURRENT_TASKS", 4))
+    # Outgoing events buffered per socket before a slow client loses intermediate events
+    WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", 256))
+    # Recent events kept per interview so reconnecting clients can resume
+    WS_REPLAY_BUFFER_SIZE = int(os.getenv("WS_REPLAY_BUFFER_SIZE", 200))
+    WS_REPLAY_TTL_SECONDS = float(os.getenv("WS_REPLAY_TTL_SECONDS", 3600))
+    # Heartbeats: ping interval, silence before a socket counts as dead, and idle timeout (0 disables)
+    WS_PING_INTERVAL_SECONDS = float(os.getenv("WS_PING_INTERVAL_SECONDS", 20))
+    WS_PING_TIMEOUT_SECONDS = float(os.getenv("WS_PING_TIMEOUT_SECONDS", 60))
+    WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", 1800))
+    # Largest editor document accepted through code_sync and code_patch
+    CODE_DOCUMENT_MAX_CHARS = int(os.getenv("CODE_DOCUMENT_MAX_CHARS", 200000))
+    # Message encodings clients may pick by subprotocol; msgpack needs the msgpack package
+    WS_WIRE_FORMATS = [f.strip() for f in os.getenv("WS_WIRE_FORMATS", "json,msgpack").split(",") if f.strip()]
+    # Let clients negotiate permessage-deflate compression
+    WS_PER_MESSAGE_DEFLATE = os.getenv("WS_PER_MESSAGE_DEFLATE", "True").lower() == "true"
+    
     # Security
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this")
     
@@ -1,18 +1,25 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 import uvicorn
 import os
 from pathlib import Path
+from typing import Optional
 
 from .config import Config
 from .routes import interviews, analysis
 from .services.websocket_manager import WebSocketManager
+from .services.event_log import get_event_log
+from .services.question_bank import get_question_bank
+from .utils.serialization import FastJSONResponse
 
 app = FastAPI(
     title="CodeSage AI Technical Interviewer",
     description="AI-powered technical interviewer with real-time code analysis and voice interaction",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -24,13 +31,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Large listing pages and reports compress well
+app.add_middleware(GZipMiddleware, minimum_size=Config.GZIP_MINIMUM_SIZE)
+
 # WebSocket manager
 websocket_manager = WebSocketManager()
+app.state.websocket_manager = websocket_manager
 
 # Include routes
 app.include_router(interviews.router, prefix="/api/interviews", tags=["interviews"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
 
+@app.on_event("startup")
+async def startup():
+    # Load and validate the question bank now rather than on the first interview
+    print(f"📚 Loaded {len(get_question_bank())} interview questions")
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Write out interviews still queued for the database and buffered event log records
+    await interviews.interviews_db.aclose()
+    if get_event_log() is not None:
+        await get_event_log().aclose()
+
 @app.get("/")
 async def root():
     return {
@@ -55,15 +78,56 @@ async def health_check():
         }
     }
 
+@app.get("/stats")
+async def stats():
+    return {
+        "status": "OK",
+        "gemini": websocket_manager.gemini_service.get_stats(),
+        "websocket": websocket_manager.get_stats(),
+        "interviews": interviews.interviews_db.get_stats(),
+        "event_log": get_event_log().get_stats() if get_event_log() is not None else None
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """LLM call and WebSocket metrics in the Prometheus text format"""
+    return PlainTextResponse(
+        websocket_manager.gemini_service.metrics.render_prometheus() + websocket_manager.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.get("/api/reports/{job_id}")
+async def get_report_job(job_id: str):
+    """Status and result of a background report job"""
+    job = websocket_manager.report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    return {"success": True, "job": job.to_dict()}
+
 @app.websocket("/ws/{interview_id}")
-async def websocket_endpoint(websocket: WebSocket, interview_id: str):
-    await websocket_manager.connect(websocket, interview_id)
+async def websocket_endpoint(websocket: WebSocket, interview_id: str, last_seq: Optional[int] = None):
+    # Reconnecting clients pass the last sequence number they saw to receive what they missed
+    connection = await websocket_manager.connect(websocket, interview_id, last_seq)
     try:
         while True:
-            data = await websocket.receive_json()
-            await websocket_manager.handle_message(websocket, interview_id, data)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            # JSON text or, when negotiated, MessagePack binary frames
+            try:
+                data = connection.decode(message)
+            except ValueError as e:
+                await connection.send_json({"type": "error", "message": f"Invalid message: {e}"})
+                continue
+            # Requests run as their own tasks so long ones don't block the socket
+            await websocket_manager.receive(connection, data)
     except WebSocketDisconnect:
-        websocket_manager.disconnect(websocket, interview_id)
+        pass
+    except Exception as e:
+        print(f"WebSocket error on {interview_id}: {e}")
+    finally:
+        await websocket_manager.disconnect(connection)
 
 if __name__ == "__main__":
     Config.validate()
@@ -71,5 +135,6 @@ if __name__ == "__main__":
         "app.main:app",
         host=Config.HOST,
         port=Config.PORT,
-        reload=Config.DEBUG
+        reload=Config.DEBUG,
+        ws_per_message_deflate=Config.WS_PER_MESSAGE_DEFLATE
     )
@@ -24,6 +24,7 @@ class Question(BaseModel):
     constraints: str
     hints: List[str]
     expected_complexity: Optional[str] = None
+    tags: List[str] = []
 
 class CodeSubmission(BaseModel):
     code: str
@@ -74,6 +75,7 @@ class CreateInterviewRequest(BaseModel):
     candidate_name: str
     difficulty: DifficultyLevel
     category: str = "all"
+    tags: List[str] = []
 
 class StartInterviewRequest(BaseModel):
     interview_id: str
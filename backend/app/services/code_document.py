@@ -0,0 +1,174 @@
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+from ..config import Config
+from ..utils.serialization import dumps, loads
+from .state_store import StateStore, StoreError, get_store, store_key
+from .event_log import EventLog, get_event_log
+
+class StaleVersionError(Exception):
+    """A patch was made against a version the server no longer holds"""
+
+class PatchError(ValueError):
+    """A patch is malformed or does not fit the document"""
+
+def apply_patches(text: str, patches: List[Dict[str, Any]]) -> str:
+    """Apply non-overlapping {start, end, text} edits whose offsets refer to the original text"""
+    edits = []
+    for patch in patches:
+        try:
+            start, end, insert = int(patch["start"]), int(patch["end"]), str(patch.get("text", ""))
+        except (KeyError, TypeError, ValueError):
+            raise PatchError("Each patch needs integer start and end offsets")
+        if not 0 <= start <= end <= len(text):
+            raise PatchError(f"Patch range {start}-{end} is outside the document")
+        edits.append((start, end, insert))
+
+    edits.sort(key=lambda edit: edit[0], reverse=True)
+    for (start, end, _), (next_start, next_end, _) in zip(edits, edits[1:]):
+        if next_end > start:
+            raise PatchError("Patches overlap")
+
+    parts = []
+    position = len(text)
+    for start, end, insert in edits:
+        parts.append(text[end:position])
+        parts.append(insert)
+        position = start
+    parts.append(text[:position])
+    return "".join(reversed(parts))
+
+def _is_version(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+class CodeDocument:
+    def __init__(self, text: str = "", version: int = 0, language: str = "python"):
+        self.text = text
+        self.version = version
+        self.language = language
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "version": self.version, "language": self.language}
+
+class CodeDocuments:
+    """The editor contents of each interview, kept in step with the client.
+
+    The client sends a full snapshot with code_sync and then only patches
+    against the version it last sent, so large files are not re-sent on
+    every keystroke-driven request. A patch against any other version is
+    rejected and the client re-syncs. With a shared state store each change
+    is also written through, so a reconnect to another worker can continue;
+    without one each version is recorded in the event log, whose snapshots
+    keep only the latest.
+    """
+
+    def __init__(self, store: StateStore = None, max_chars: int = None, event_log: EventLog = None):
+        self.store = store or get_store()
+        self.event_log = event_log or get_event_log()
+        self.max_chars = max_chars or Config.CODE_DOCUMENT_MAX_CHARS
+        self._documents: Dict[str, CodeDocument] = {}
+        self._pending_writes: Set[asyncio.Task] = set()
+        self.syncs = 0
+        self.patches = 0
+        self.conflicts = 0
+
+    def get(self, interview_id: str) -> Optional[CodeDocument]:
+        return self._documents.get(interview_id)
+
+    async def load(self, interview_id: str):
+        """Pick up the shared copy, which another worker may have updated, or the logged one after a restart"""
+        if not self.store.shared:
+            if self.event_log is not None and interview_id not in self._documents:
+                try:
+                    state = await self.event_log.load(interview_id)
+                except (OSError, ValueError) as e:
+                    print(f"Could not rebuild code document {interview_id}: {e}")
+                    return
+                if state and "code" in state:
+                    self._documents[interview_id] = CodeDocument(**state["code"])
+            return
+        try:
+            data = await self.store.get(self._key(interview_id))
+        except StoreError as e:
+            print(f"Could not load code document {interview_id}: {e}")
+            return
+        if data is not None:
+            self._documents[interview_id] = CodeDocument(**loads(data))
+
+    def sync(self, interview_id: str, text: str, version: int = None, language: str = None) -> CodeDocument:
+        """Replace the document with a full snapshot"""
+        if version is not None and not _is_version(version):
+            raise PatchError("version must be an integer")
+        if len(text) > self.max_chars:
+            raise PatchError(f"Code is longer than {self.max_chars} characters")
+        current = self._documents.get(interview_id)
+        document = CodeDocument(
+            text,
+            version if version is not None else (current.version + 1 if current else 1),
+            language or (current.language if current else "python")
+        )
+        self._documents[interview_id] = document
+        self.syncs += 1
+        self._save(interview_id, document)
+        return document
+
+    def patch(self, interview_id: str, base_version: int, patches: List[Dict[str, Any]]) -> CodeDocument:
+        """Apply patches made against base_version, producing version base_version + 1"""
+        if not _is_version(base_version):
+            raise PatchError("base_version must be an integer")
+        if not isinstance(patches, list):
+            raise PatchError("patches must be a list")
+        document = self._documents.get(interview_id)
+        if document is None or document.version != base_version:
+            self.conflicts += 1
+            raise StaleVersionError(f"Expected version {document.version if document else 0}, got {base_version}")
+        text = apply_patches(document.text, patches)
+        if len(text) > self.max_chars:
+            raise PatchError(f"Code is longer than {self.max_chars} characters")
+        document.text = text
+        document.version += 1
+        self.patches += 1
+        self._save(interview_id, document)
+        return document
+
+    def forget(self, interview_id: str):
+        """Drop this process's copy of the document"""
+        self._documents.pop(interview_id, None)
+
+    async def end(self, interview_id: str):
+        """Drop the document, including any shared copy, once the interview is complete"""
+        self.forget(interview_id)
+        if self.event_log is not None:
+            await self.event_log.delete(interview_id)
+        if self.store.shared:
+            try:
+                await self.store.delete(self._key(interview_id))
+            except StoreError as e:
+                print(f"Could not delete code document {interview_id}: {e}")
+
+    @staticmethod
+    def _key(interview_id: str) -> str:
+        return store_key("code", interview_id)
+
+    def _save(self, interview_id: str, document: CodeDocument):
+        if not self.store.shared:
+            if self.event_log is not None:
+                self.event_log.append(interview_id, "code", document.to_dict())
+            return
+        task = asyncio.ensure_future(self.store.set(
+            self._key(interview_id), dumps(document.to_dict()).decode(), Config.STATE_SESSION_TTL_SECONDS
+        ))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task: asyncio.Task):
+        self._pending_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Code document write-through failed: {task.exception()}")
+
+    def get_stats(self) -> dict:
+        return {
+            "documents": len(self._documents),
+            "syncs": self.syncs,
+            "patches": self.patches,
+            "conflicts": self.conflicts
+        }
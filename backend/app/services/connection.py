@@ -0,0 +1,237 @@
+from collections import deque
+from fastapi import WebSocket
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+import asyncio
+import time
+import uuid
+from ..config import Config
+from .wire_format import JSON, WireFormat
+
+# Intermediate events a slow consumer may lose, keyed by the fields that
+# identify their stream; a later event of the same stream supersedes them.
+# The final event of a stream carries the same fields.
+COALESCE_KEYS = {
+    "ai_response_delta": ("source", "stream_id"),
+    "report_progress": ("job_id",)
+}
+
+# Keep-alive traffic, which does not count as activity
+HEARTBEAT_EVENTS = {"ping", "pong"}
+
+class Reply:
+    """Sends the responses to one client request, tagged with its request_id.
+
+    Every response also carries a stream_id the server assigns to the
+    request. Clients number request_ids per socket, so only the stream_id
+    tells apart the streams of two participants in one interview.
+
+    If the socket has gone away the request still runs to completion and
+    its events still reach on_reply, so a resuming client can replay them.
+    """
+
+    def __init__(self, connection: "Connection", request_id: Optional[str] = None):
+        self.connection = connection
+        self.request_id = request_id
+        self.stream_id = uuid.uuid4().hex[:16]
+
+    async def send_json(self, data: Dict[str, Any]):
+        # Tagged first, so copies sent to observers keep the streams of different requests apart
+        data = {**data, "stream_id": self.stream_id}
+        if self.request_id is not None:
+            data["request_id"] = self.request_id
+        if self.connection.on_reply is not None:
+            data = await self.connection.on_reply(self.connection, data)
+        if not self.connection.closed:
+            await self.connection.send_json(data)
+
+# Handles one client message: (reply, interview_id, message)
+MessageHandler = Callable[[Reply, str, Dict[str, Any]], Awaitable[None]]
+
+class Connection:
+    """One interview WebSocket with concurrently handled requests.
+
+    Each incoming message runs as its own task, so a slow report or code run
+    does not hold up chat and hints on the same socket. At most
+    WS_MAX_CONCURRENT_TASKS run at once; beyond that, a request is answered
+    with a busy error straight away, so the socket keeps being read and
+    heartbeats keep flowing while every slot is taken.
+
+    Outgoing events go through a bounded outbox drained by a single writer
+    task, so frames never interleave and a slow client never blocks the code
+    producing events. While a backlog exists, streamed deltas are merged and
+    progress updates replaced; once the outbox is full such intermediate
+    events are dropped, and a client that cannot even keep up with final
+    events is disconnected.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        interview_id: str,
+        max_tasks: int = None,
+        max_queue: int = None,
+        wire_format: WireFormat = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.interview_id = interview_id
+        self.wire_format = wire_format or JSON
+        self.max_tasks = max_tasks or Config.WS_MAX_CONCURRENT_TASKS
+        self.max_queue = max_queue or Config.WS_SEND_QUEUE_SIZE
+        self.tasks: Set[asyncio.Task] = set()
+        self._outbox: Deque[Dict[str, Any]] = deque()
+        self._outbox_ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+        # Called with (connection, event) for every reply before it is sent; returns the event to send
+        self.on_reply: Optional[Callable[["Connection", Dict[str, Any]], Awaitable[Dict[str, Any]]]] = None
+        self.coalesced = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.bytes_sent = 0
+        # Any frame from the client proves it is alive; activity excludes heartbeats
+        self.last_seen = self.last_activity = time.monotonic()
+
+    async def send_json(self, data: Dict[str, Any]):
+        """Queue an event for this socket, raising ConnectionError once it is closed"""
+        if self.closed:
+            raise ConnectionError("WebSocket connection closed")
+        self.enqueue(data)
+
+    def enqueue(self, data: Dict[str, Any]) -> bool:
+        """Queue an event without waiting; False if it was dropped"""
+        if self.closed:
+            return False
+        if data.get("type") not in HEARTBEAT_EVENTS:
+            self.last_activity = time.monotonic()
+        if self._coalesce(data):
+            return True
+        if len(self._outbox) >= self.max_queue:
+            if data.get("type") in COALESCE_KEYS or not self._drop_intermediate():
+                self.dropped += 1
+                if data.get("type") not in COALESCE_KEYS:
+                    print(f"Disconnecting slow WebSocket client on {self.interview_id}")
+                    self.abort(1013)
+                return False
+        self._outbox.append(data)
+        self._outbox_ready.set()
+        if self._writer is None:
+            self._writer = asyncio.ensure_future(self._write())
+        return True
+
+    def prepend(self, events: List[Dict[str, Any]]):
+        """Queue replayed events ahead of live ones, skipping any already queued"""
+        if self.closed:
+            return
+        queued = {event.get("seq") for event in self._outbox if "seq" in event}
+        self._outbox.extendleft(reversed([event for event in events if event.get("seq") not in queued]))
+        self._outbox_ready.set()
+        if self._writer is None:
+            self._writer = asyncio.ensure_future(self._write())
+
+    def _coalesce(self, data: Dict[str, Any]) -> bool:
+        fields = COALESCE_KEYS.get(data.get("type"))
+        if fields is None:
+            return False
+        stream = tuple(data.get(field) for field in fields)
+        # Only the newest queued event of the stream may absorb this one; if
+        # that is another type, such as the stream's final event, keep order
+        for i in range(len(self._outbox) - 1, -1, -1):
+            queued = self._outbox[i]
+            if tuple(queued.get(field) for field in fields) != stream:
+                continue
+            if queued.get("type") != data["type"]:
+                return False
+            if data["type"] == "ai_response_delta":
+                data = {**queued, "delta": queued["delta"] + data["delta"]}
+            self._outbox[i] = data
+            self.coalesced += 1
+            return True
+        return False
+
+    def _drop_intermediate(self) -> bool:
+        for i, queued in enumerate(self._outbox):
+            if queued.get("type") in COALESCE_KEYS:
+                del self._outbox[i]
+                self.dropped += 1
+                return True
+        return False
+
+    async def _write(self):
+        while not self.closed:
+            if not self._outbox:
+                self._outbox_ready.clear()
+                await self._outbox_ready.wait()
+                continue
+            data = self._outbox.popleft()
+            try:
+                frame = self.wire_format.encode(data)
+                if self.wire_format.binary:
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame.decode())
+                self.bytes_sent += len(frame)
+            except Exception as e:
+                print(f"WebSocket send error: {e}")
+                self.close()
+
+    def decode(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse a received ASGI websocket message; ValueError if it is not a valid request"""
+        frame = message.get("bytes")
+        if frame is None:
+            frame = message.get("text")
+        if frame is None:
+            raise ValueError("Empty message")
+        return self.wire_format.decode(frame)
+
+    def abort(self, code: int):
+        """Stop sending and close the socket with the given close code"""
+        self.close()
+        asyncio.ensure_future(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    @property
+    def backlog(self) -> int:
+        return len(self._outbox)
+
+    def dispatch(self, handler: MessageHandler, data: Dict[str, Any]) -> bool:
+        """Start handling a message as its own task; False if every task slot was taken"""
+        request_id = data.get("request_id")
+        if len(self.tasks) >= self.max_tasks:
+            self.rejected += 1
+            response = {"type": "error", "source": data.get("type"), "message": "Too many requests in progress, try again"}
+            if request_id is not None:
+                response["request_id"] = str(request_id)
+            self.enqueue(response)
+            return False
+        reply = Reply(self, str(request_id) if request_id is not None else None)
+        task = asyncio.ensure_future(self._run(handler, reply, data))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return True
+
+    async def _run(self, handler: MessageHandler, reply: Reply, data: Dict[str, Any]):
+        try:
+            await handler(reply, self.interview_id, data)
+        except Exception as e:
+            print(f"WebSocket handler error ({data.get('type')}): {e}")
+            try:
+                await reply.send_json({
+                    "type": "error",
+                    "source": data.get("type"),
+                    "message": "Request failed"
+                })
+            except Exception:
+                pass
+
+    def close(self):
+        """Stop sending; requests still running finish without a socket to reply to"""
+        self.closed = True
+        self._outbox.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
@@ -0,0 +1,331 @@
+"""Append-only, per-interview event log on local disk.
+
+Each interview has a directory under EVENT_LOG_DIR holding numbered log
+files and at most one snapshot:
+
+    events-<generation>.log   length-prefixed records, appended in order
+    snapshot.json             state folded from every generation before its own
+
+A record is a 4-byte length, a 4-byte CRC32 and a JSON payload of
+[key, value, maxlen]. With a maxlen the value is appended to the key's
+list, keeping the last maxlen items; without one it replaces the key's
+value, as for editor code, so older values are superseded.
+
+Appends go to a buffered file and are fsynced every
+EVENT_LOG_FSYNC_INTERVAL_SECONDS, so a crash loses at most that window.
+After EVENT_LOG_SNAPSHOT_EVERY records or EVENT_LOG_SNAPSHOT_BYTES, new
+appends move to the next generation and the previous ones are folded into
+a new snapshot in the background. Folding keeps only each list's last
+items and the latest replaced values, which compacts the log; the old
+files are deleted once the snapshot is in place. Recovery loads the
+snapshot and replays the newer generations, each up to any torn record;
+a process never appends to a file it did not create, so records written
+after a crash start a fresh generation instead of following a torn tail.
+Finding that generation reads the snapshot, so a log is opened on the
+log's thread and records appended meanwhile are held in memory. The log
+of a completed interview is deleted.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple
+import asyncio
+import os
+import shutil
+import struct
+import zlib
+from ..config import Config
+from ..utils.serialization import dumps, loads
+
+HEADER = struct.Struct(">II")
+
+def encode_record(key: str, value: Any, maxlen: Optional[int]) -> bytes:
+    payload = dumps([key, value, maxlen])
+    return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def read_records(path: Path) -> List[list]:
+    """Records in a log file, up to the first incomplete or corrupt one"""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    records, position = [], 0
+    while position + HEADER.size <= len(data):
+        length, checksum = HEADER.unpack_from(data, position)
+        payload = data[position + HEADER.size:position + HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            print(f"Event log {path} ends in a torn record; ignoring its last {len(data) - position} bytes")
+            break
+        records.append(loads(payload))
+        position += HEADER.size + length
+    return records
+
+def fold(state: Dict[str, Any], records: List[list]) -> Dict[str, Any]:
+    """Apply records to a state of lists and replaced values"""
+    for key, value, maxlen in records:
+        if maxlen is None:
+            state[key] = value
+        else:
+            items = state.setdefault(key, [])
+            items.append(value)
+            if len(items) > maxlen:
+                del items[:len(items) - maxlen]
+    return state
+
+class InterviewLog:
+    """The open log of one interview"""
+
+    def __init__(self, directory: Path, generation: int):
+        self.directory = directory
+        self.generation = generation
+        self.handle: Optional[BinaryIO] = None
+        # Set while the file is being opened; records appended until then wait in pending
+        self.opening: Optional[asyncio.Future] = None
+        self.pending: List[bytes] = []
+        self.records = 0
+        self.bytes = 0
+        self.dirty = False
+        self.snapshotting = False
+
+    def path(self, generation: int) -> Path:
+        return self.directory / f"events-{generation}.log"
+
+    def open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.handle = open(self.path(self.generation), "ab")
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+def log_generations(directory: Path) -> List[int]:
+    generations = []
+    for path in directory.glob("events-*.log"):
+        try:
+            generations.append(int(path.stem.split("-", 1)[1]))
+        except ValueError:
+            continue
+    return sorted(generations)
+
+def read_snapshot(directory: Path) -> tuple:
+    """(generation, state) of the snapshot, or (0, {}) without one"""
+    try:
+        snapshot = loads((directory / "snapshot.json").read_bytes())
+    except FileNotFoundError:
+        return 0, {}
+    return snapshot["generation"], snapshot["state"]
+
+class EventLog:
+    def __init__(self, directory: str = None):
+        self.directory = Path(directory or Config.EVENT_LOG_DIR)
+        self.snapshot_every = Config.EVENT_LOG_SNAPSHOT_EVERY
+        self.snapshot_bytes = Config.EVENT_LOG_SNAPSHOT_BYTES
+        self._logs: Dict[str, InterviewLog] = {}
+        # One thread does all fsyncs and snapshots, so they never overlap for a log
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-log")
+        self._syncer: Optional[asyncio.Task] = None
+        self._snapshots: Set[asyncio.Future] = set()
+        self.appended = 0
+        self.fsyncs = 0
+        self.snapshots = 0
+        self.deleted = 0
+
+    def _directory(self, interview_id: str) -> Path:
+        safe_id = "".join(c for c in interview_id if c.isalnum() or c in "-_")
+        return self.directory / safe_id
+
+    def _log(self, interview_id: str) -> InterviewLog:
+        log = self._logs.get(interview_id)
+        if log is None:
+            log = InterviewLog(self._directory(interview_id), 0)
+            log.opening = asyncio.get_event_loop().run_in_executor(self._executor, self._open, log.directory)
+            log.opening.add_done_callback(lambda future: self._opened(interview_id, log, future))
+            self._logs[interview_id] = log
+        return log
+
+    @staticmethod
+    def _open(directory: Path) -> Tuple[int, BinaryIO]:
+        generations = log_generations(directory) if directory.exists() else []
+        # Never append to a file from before this process: it may end in a
+        # torn record, and replay stops there, so start a new generation
+        generation = read_snapshot(directory)[0] if directory.exists() else 0
+        if generations:
+            generation = max(generation, generations[-1] + 1)
+        directory.mkdir(parents=True, exist_ok=True)
+        return generation, open(directory / f"events-{generation}.log", "ab")
+
+    def _opened(self, interview_id: str, log: InterviewLog, future: asyncio.Future):
+        log.opening = None
+        if future.cancelled() or future.exception() is not None:
+            print(f"Event log could not be opened for {interview_id}: {None if future.cancelled() else future.exception()}")
+            log.pending.clear()
+            if self._logs.get(interview_id) is log:
+                del self._logs[interview_id]
+            return
+        log.generation, log.handle = future.result()
+        for record in log.pending:
+            log.handle.write(record)
+        log.pending.clear()
+        if self._logs.get(interview_id) is not log:
+            # Closed while opening; closing writes out the held records
+            log.close()
+            return
+        self._maybe_snapshot(interview_id, log)
+
+    def append(self, interview_id: str, key: str, value: Any, maxlen: Optional[int] = None):
+        """Buffer a record; with maxlen it extends the key's list, without it replaces the key's value"""
+        log = self._log(interview_id)
+        record = encode_record(key, value, maxlen)
+        if log.handle is None:
+            log.pending.append(record)
+        else:
+            log.handle.write(record)
+        log.records += 1
+        log.bytes += len(record)
+        log.dirty = True
+        self.appended += 1
+        self._start_syncer()
+        self._maybe_snapshot(interview_id, log)
+
+    def _maybe_snapshot(self, interview_id: str, log: InterviewLog):
+        if log.handle is None or log.snapshotting:
+            return
+        if log.records >= self.snapshot_every or log.bytes >= self.snapshot_bytes:
+            self._snapshot(interview_id, log)
+
+    def _start_syncer(self):
+        if self._syncer is None or self._syncer.done():
+            self._syncer = asyncio.ensure_future(self._sync_periodically())
+
+    async def _sync_periodically(self):
+        while True:
+            await asyncio.sleep(Config.EVENT_LOG_FSYNC_INTERVAL_SECONDS)
+            await self.sync()
+
+    async def sync(self):
+        """Write buffered records and fsync every log that changed"""
+        handles = []
+        for log in self._logs.values():
+            if log.dirty and log.handle is not None:
+                log.handle.flush()
+                log.dirty = False
+                handles.append(log.handle)
+        if not handles:
+            return
+
+        def fsync():
+            for handle in handles:
+                try:
+                    os.fsync(handle.fileno())
+                except (OSError, ValueError):
+                    # Closed since; closing flushed it and a snapshot fsyncs it
+                    pass
+
+        await asyncio.get_event_loop().run_in_executor(self._executor, fsync)
+        self.fsyncs += 1
+
+    def _snapshot(self, interview_id: str, log: InterviewLog):
+        # New appends go to the next generation while the older ones are folded
+        log.close()
+        sealed = log.generation
+        log.generation += 1
+        log.records = log.bytes = 0
+        log.snapshotting = True
+        log.open()
+        future = asyncio.get_event_loop().run_in_executor(self._executor, self._write_snapshot, log.directory, sealed)
+        self._snapshots.add(future)
+
+        def done(future: asyncio.Future):
+            self._snapshots.discard(future)
+            log.snapshotting = False
+            if future.exception() is not None:
+                print(f"Event log snapshot failed for {interview_id}: {future.exception()}")
+            else:
+                self.snapshots += 1
+
+        future.add_done_callback(done)
+
+    @staticmethod
+    def _write_snapshot(directory: Path, sealed: int):
+        generation, state = read_snapshot(directory)
+        folded = [g for g in log_generations(directory) if generation <= g <= sealed]
+        for g in folded:
+            state = fold(state, read_records(directory / f"events-{g}.log"))
+        temporary = directory / "snapshot.json.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(dumps({"generation": sealed + 1, "state": state}))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, directory / "snapshot.json")
+        for g in folded:
+            (directory / f"events-{g}.log").unlink(missing_ok=True)
+
+    async def load(self, interview_id: str) -> Optional[Dict[str, Any]]:
+        """State rebuilt from the snapshot and newer records, or None if the interview has no log"""
+        directory = self._directory(interview_id)
+        log = self._logs.get(interview_id)
+        if log is not None and log.opening is not None:
+            # Its held records reach the file once it is open
+            await asyncio.shield(log.opening)
+        if log is not None and log.handle is not None:
+            log.handle.flush()
+
+        def rebuild():
+            if not directory.exists():
+                return None
+            generation, state = read_snapshot(directory)
+            for g in log_generations(directory):
+                if g >= generation:
+                    state = fold(state, read_records(directory / f"events-{g}.log"))
+            return state
+
+        return await asyncio.get_event_loop().run_in_executor(self._executor, rebuild)
+
+    def close(self, interview_id: str):
+        """Close an interview's log file; its records stay on disk"""
+        log = self._logs.pop(interview_id, None)
+        if log is not None:
+            log.close()
+
+    async def delete(self, interview_id: str):
+        """Close an interview's log and remove its records once the interview is complete"""
+        self.close(interview_id)
+        directory = self._directory(interview_id)
+
+        def remove() -> bool:
+            if not directory.exists():
+                return False
+            shutil.rmtree(directory, ignore_errors=True)
+            return True
+
+        # Queued behind any open or snapshot of this log on the same thread
+        if await asyncio.get_event_loop().run_in_executor(self._executor, remove):
+            self.deleted += 1
+
+    async def aclose(self):
+        opening = [log.opening for log in self._logs.values() if log.opening is not None]
+        if opening:
+            await asyncio.gather(*opening, return_exceptions=True)
+        await self.sync()
+        if self._snapshots:
+            await asyncio.gather(*self._snapshots, return_exceptions=True)
+        for interview_id in list(self._logs):
+            self.close(interview_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "open_logs": len(self._logs),
+            "appended": self.appended,
+            "fsyncs": self.fsyncs,
+            "snapshots": self.snapshots,
+            "deleted": self.deleted
+        }
+
+_event_log: Optional[EventLog] = None
+
+def get_event_log() -> Optional[EventLog]:
+    """Process-wide event log, or None when EVENT_LOG_ENABLED is off"""
+    global _event_log
+    if _event_log is None and Config.EVENT_LOG_ENABLED:
+        _event_log = EventLog()
+    return _event_log
@@ -1,16 +1,70 @@
-import google.generativeai as genai
-from typing import Dict, Any, List
-import json
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 import asyncio
+import json
+import time
 from ..config import Config
+import hashlib
+from .llm_client import LLMClient, ChunkCallback, CallTimings
+from .llm_metrics import LLMMetrics, CallRecord
+from .hint_cache import HintCache
+from .prompt_builder import PromptBuilder, estimate_tokens
+from .single_flight import SingleFlight
+from .rate_limiter import Priority
+from .session_store import RingBuffer
+from ..utils.logger import log_ai_interaction
+
+# Condensed few-shot example showing the expected tone and length
+FEW_SHOT_EXAMPLE = """Problem: Find duplicates in an array.
+        Candidate's Code: nested loops comparing arr[i] with arr[j] for every j > i.
+        CodeSage: “Your logic is correct! This is O(n²), so a million elements means a trillion comparisons. Can you think of a single-pass approach?”
+        Candidate: “Maybe using a hash set?”
+        CodeSage: “Exactly! Hash sets offer O(1) average lookup. Want to try implementing that?”"""
+
+REPORT_FAILED_MESSAGE = "Performance report generation failed. Please try again."
+
+# Receives report progress as (stage, steps done, total steps)
+ProgressCallback = Callable[[str, int, int], Awaitable[None]]
+
+def render_report(data: str) -> str:
+    return f"""You are CodeSage, an AI technical interviewer. Generate a comprehensive performance report:
+            
+            Interview Data: {data}
+            
+            Create a detailed report that includes:
+            1. Overall performance assessment
+            2. Strengths and areas for improvement
+            3. Technical skills evaluation
+            4. Problem-solving approach analysis
+            5. Communication and collaboration assessment
+            6. Recommendations for development
+            
+            Be professional, constructive, and specific. Provide actionable feedback."""
+
+def render_question_summary(question: str, data: str) -> str:
+    return f"""You are CodeSage, an AI technical interviewer. Summarize the candidate's work on one interview question for a later overall report.
+            
+            Question: {question}
+            Work on this question: {data}
+            
+            In at most 120 words, cover correctness, complexity reached, how the solution evolved, and hint usage. Be factual and specific."""
+
+FALLBACK_FOLLOW_UP = "Can you explain your approach and what you think the time complexity is?"
+
+# Output contract for the combined feedback / follow-up / hint ladder call
+COMBINED_OUTPUT_FORMAT = """
+        Respond with only a JSON object, no markdown fences, in exactly this shape:
+        {"feedback": "<your adaptive feedback as described above>",
+         "follow_up_question": "<one specific question probing their understanding, complexity or alternatives>",
+         "hints": ["<subtle, encouraging hint>", "<more specific hint toward the approach>", "<specific data structure or algorithm guidance without full code>"]}
+        """
 
 class GeminiInterviewer:
-    def __init__(self):
-        if Config.GEMINI_API_KEY:
-            genai.configure(api_key=Config.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.5-pro')
-        else:
-            self.model = None
+    def __init__(self, llm: LLMClient = None):
+        self.llm = llm or LLMClient()
+        self.hint_cache = HintCache()
+        self.prompts = PromptBuilder()
+        self.single_flight = SingleFlight()
+        self.metrics = LLMMetrics()
         self.conversation_history = {}
     
     async def generate_adaptive_response(
@@ -19,64 +73,138 @@ class GeminiInterviewer:
         analysis: Dict[str, Any], 
         conversation_context: List[Dict],
         problem_description: str = "",
-        interview_id: str = ""
+        interview_id: str = "",
+        on_chunk: Optional[ChunkCallback] = None
     ) -> str:
         """Generate adaptive AI response using Gemini"""
-        if not self.model:
+        if not self.llm.available:
+            self._record_unavailable("response", interview_id)
             return self._get_fallback_response(analysis)
             
         try:
-            prompt = self._build_interview_prompt(code, analysis, conversation_context, problem_description)
-            
-            # Use asyncio to run the synchronous generate_content in a thread
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.model.generate_content(prompt)
+            prompt = self._build_interview_prompt(
+                code, analysis, conversation_context, problem_description, interview_id
             )
             
+            text = await self._generate(prompt, on_chunk, call_type="response", interview_id=interview_id)
+            
             # Store in conversation history
             if interview_id not in self.conversation_history:
-                self.conversation_history[interview_id] = []
+                self.conversation_history[interview_id] = RingBuffer(maxlen=Config.SESSION_MAX_HISTORY)
             
             self.conversation_history[interview_id].append({
                 "role": "assistant",
-                "content": response.text
+                "content": text
             })
             
-            return response.text
+            return text
         except Exception as e:
             print(f"Gemini API error: {e}")
             return self._get_fallback_response(analysis)
     
-    async def generate_hint(self, code: str, problem_description: str, hint_level: int, interview_id: str = "") -> str:
+    async def generate_combined_feedback(
+        self,
+        code: str,
+        analysis: Dict[str, Any],
+        conversation_context: List[Dict],
+        problem_description: str = "",
+        interview_id: str = "",
+        question_id: str = ""
+    ) -> Dict[str, Any]:
+        """Generate feedback, a follow-up question and a three-level hint ladder in one call.
+        
+        Returns a dict with "feedback" (always set), "follow_up_question"
+        (None if unavailable) and "hints" (a list, empty if unavailable).
+        The hints are also cached, so generate_hint returns them for this code.
+        """
+        result = {
+            "feedback": self._get_fallback_response(analysis),
+            "follow_up_question": None,
+            "hints": []
+        }
+        if not self.llm.available:
+            self._record_unavailable("combined", interview_id)
+            return result
+            
+        try:
+            prompt = self._build_interview_prompt(
+                code, analysis, conversation_context, problem_description, interview_id,
+                output_format=COMBINED_OUTPUT_FORMAT
+            )
+            result.update(self._parse_combined(
+                await self._generate(prompt, call_type="combined", interview_id=interview_id)
+            ))
+            for level, hint in enumerate(result["hints"], start=1):
+                self.hint_cache.set(self._hint_key(question_id, problem_description, level, code), hint)
+            
+            if interview_id not in self.conversation_history:
+                self.conversation_history[interview_id] = RingBuffer(maxlen=Config.SESSION_MAX_HISTORY)
+            
+            self.conversation_history[interview_id].append({
+                "role": "assistant",
+                "content": result["feedback"]
+            })
+        except Exception as e:
+            print(f"Gemini API error: {e}")
+        return result
+    
+    def _hint_key(self, question_id: str, problem_description: str, hint_level: int, code: str):
+        # Without a question id, the problem text identifies the question
+        return self.hint_cache.make_key(
+            question_id or hashlib.sha256(problem_description.encode()).hexdigest()[:16],
+            hint_level,
+            code
+        )
+    
+    @staticmethod
+    def _parse_combined(text: str) -> Dict[str, Any]:
+        """Extract the combined JSON answer, tolerating markdown fences around it"""
+        start, end = text.find("{"), text.rfind("}")
+        try:
+            data = json.loads(text[start:end + 1]) if start != -1 else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or not data.get("feedback"):
+            # Not the JSON we asked for; the text is still usable feedback
+            return {"feedback": text.strip()}
+        
+        hints = data.get("hints")
+        return {
+            "feedback": str(data["feedback"]),
+            "follow_up_question": str(data["follow_up_question"]) if data.get("follow_up_question") else None,
+            "hints": [str(hint) for hint in hints[:3] if hint] if isinstance(hints, list) else []
+        }
+    
+    async def generate_hint(
+        self,
+        code: str,
+        problem_description: str,
+        hint_level: int,
+        interview_id: str = "",
+        on_chunk: Optional[ChunkCallback] = None,
+        question_id: str = ""
+    ) -> str:
         """Generate progressive hints"""
-        if not self.model:
+        if not self.llm.available:
+            self._record_unavailable("hint", interview_id)
             return self._get_fallback_hint(hint_level)
+        
+        cache_key = self._hint_key(question_id, problem_description, hint_level, code)
+        cached_hint = self.hint_cache.get(cache_key)
+        if cached_hint is not None:
+            self.record_cached("hint", interview_id)
+            return cached_hint
             
         try:
-            hint_prompts = {
-                1: f"""Directly provide one subtle, encouraging hint for the following coding problem based on the user's code. Do not explain your process or philosophy.
-
-                Problem: {problem_description}
-                Candidate's Code:
-                ```
-                {code}
-                ```
-                
-                Your Hint:""",
-                
-                2: f"""Directly provide a more specific hint pointing towards the solution approach for the following problem. Do not explain your process.
-
-                Problem: {problem_description}
-                Candidate's Code:
-                ```
-                {code}
-                ```
-                
-                Your Hint:""",
-                
-                3: f"""Directly provide a specific guidance on the data structure or algorithm to use for the following problem. Be direct and educational, but do not give the full code. If the candidate's code is empty, suggest a common approach for this type of problem. Do not explain your process.
+            hint_instructions = {
+                1: "Directly provide one subtle, encouraging hint for the following coding problem based on the user's code. Do not explain your process or philosophy.",
+                2: "Directly provide a more specific hint pointing towards the solution approach for the following problem. Do not explain your process.",
+                3: "Directly provide a specific guidance on the data structure or algorithm to use for the following problem. Be direct and educational, but do not give the full code. If the candidate's code is empty, suggest a common approach for this type of problem. Do not explain your process."
+            }
+            instruction = hint_instructions.get(hint_level, hint_instructions[1])
+            
+            def render(code: str, conversation: str) -> str:
+                return f"""{instruction}
 
                 Problem: {problem_description}
                 Candidate's Code:
@@ -85,32 +213,38 @@ class GeminiInterviewer:
                 ```
                 
                 Your Hint:"""
-            }
             
-            prompt = hint_prompts.get(hint_level, hint_prompts[1])
+            prompt = self.prompts.fit("hint", render, code)
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.model.generate_content(prompt)
-            )
-            
-            return response.text
+            hint = await self._generate(prompt, on_chunk, call_type="hint", interview_id=interview_id)
+            self.hint_cache.set(cache_key, hint)
+            return hint
         except Exception as e:
             print(f"Gemini API error: {e}")
             return self._get_fallback_hint(hint_level)
     
-    async def generate_follow_up_question(self, code: str, analysis: Dict[str, Any], problem_description: str, interview_id: str = "") -> str:
+    async def generate_follow_up_question(
+        self,
+        code: str,
+        analysis: Dict[str, Any],
+        problem_description: str,
+        interview_id: str = "",
+        on_chunk: Optional[ChunkCallback] = None
+    ) -> str:
         """Generate follow-up questions to probe understanding"""
-        if not self.model:
-            return "Can you explain your approach and what you think the time complexity is?"
+        if not self.llm.available:
+            self._record_unavailable("follow_up", interview_id)
+            return FALLBACK_FOLLOW_UP
             
         try:
-            prompt = f"""You are CodeSage, an AI technical interviewer. Generate a follow-up question based on the candidate's code:
+            compact_analysis = json.dumps(self.prompts.compact_analysis(analysis))
+            
+            def render(code: str, conversation: str) -> str:
+                return f"""You are CodeSage, an AI technical interviewer. Generate a follow-up question based on the candidate's code:
             
             Problem: {problem_description}
             Code: {code}
-            Analysis: {analysis}
+            Analysis: {compact_analysis}
             
             Ask a thoughtful question that:
             1. Probes the candidate's understanding of their approach
@@ -120,75 +254,254 @@ class GeminiInterviewer:
             
             Be conversational and educational. Ask one specific question."""
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.model.generate_content(prompt)
-            )
-            
-            return response.text
+            prompt = self.prompts.fit("follow_up", render, code)
+            return await self._generate(prompt, on_chunk, call_type="follow_up", interview_id=interview_id)
         except Exception as e:
             print(f"Gemini API error: {e}")
-            return "Can you explain your approach and what you think the time complexity is?"
+            return FALLBACK_FOLLOW_UP
     
-    async def generate_performance_report(self, interview_data: Dict[str, Any], interview_id: str = "") -> str:
+    async def generate_performance_report(
+        self,
+        interview_data: Dict[str, Any],
+        interview_id: str = "",
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
         """Generate comprehensive performance report"""
-        if not self.model:
-            return "Performance report generation requires Gemini API key. Please configure it in your environment."
-            
         try:
-            prompt = f"""You are CodeSage, an AI technical interviewer. Generate a comprehensive performance report:
-            
-            Interview Data: {json.dumps(interview_data, indent=2)}
-            
-            Create a detailed report that includes:
-            1. Overall performance assessment
-            2. Strengths and areas for improvement
-            3. Technical skills evaluation
-            4. Problem-solving approach analysis
-            5. Communication and collaboration assessment
-            6. Recommendations for development
-            
-            Be professional, constructive, and specific. Provide actionable feedback."""
-            
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.model.generate_content(prompt)
-            )
-            
-            return response.text
+            return await self.build_performance_report(interview_data, interview_id, on_progress)
         except Exception as e:
             print(f"Gemini API error: {e}")
-            return "Performance report generation failed. Please try again."
+            return REPORT_FAILED_MESSAGE
+    
+    async def build_performance_report(
+        self,
+        interview_data: Dict[str, Any],
+        interview_id: str = "",
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """Generate the report, raising on LLM errors.
+        
+        Interviews that cover several questions are summarized map-reduce
+        style: one small call per question, run in parallel, then one call
+        that writes the overall report from those summaries.
+        """
+        if not self.llm.available:
+            self._record_unavailable("report", interview_id)
+            return "Performance report generation requires Gemini API key. Please configure it in your environment."
+        
+        groups = self._group_by_question(interview_data)
+        if len(groups) <= 1:
+            await self._report_progress(on_progress, "writing", 0, 1)
+            data = self.prompts.report_payload(
+                interview_data, interview_id, overhead_tokens=estimate_tokens(render_report(""))
+            )
+            return await self._generate(
+                render_report(data), timeout=Config.LLM_REPORT_TIMEOUT_SECONDS, priority=Priority.REPORT,
+                call_type="report", interview_id=interview_id
+            )
+        
+        total = len(groups) + 1
+        done = 0
+        await self._report_progress(on_progress, "summarizing", done, total)
+        
+        async def summarize(question: str, section: Dict[str, Any]) -> Dict[str, str]:
+            nonlocal done
+            data = self.prompts.report_payload(
+                section, overhead_tokens=estimate_tokens(render_question_summary(question, "")),
+                call_type="report_section"
+            )
+            summary = await self._generate(
+                render_question_summary(question, data),
+                timeout=Config.LLM_REPORT_TIMEOUT_SECONDS,
+                priority=Priority.REPORT,
+                call_type="report_section",
+                interview_id=interview_id
+            )
+            done += 1
+            await self._report_progress(on_progress, "summarizing", done, total)
+            return {"question": question, "summary": summary}
+        
+        summaries = await asyncio.gather(*(summarize(q, section) for q, section in groups.items()))
+        
+        overall = json.dumps({
+            "questions": summaries,
+            "hints_used": len(interview_data.get("hints_used", [])),
+            "conversation": self.prompts.conversation(
+                interview_id, list(interview_data.get("conversation_history", []))
+            )
+        })
+        await self._report_progress(on_progress, "writing", done, total)
+        return await self._generate(
+            render_report(overall), timeout=Config.LLM_REPORT_TIMEOUT_SECONDS, priority=Priority.REPORT,
+            call_type="report", interview_id=interview_id
+        )
+    
+    @staticmethod
+    def _group_by_question(interview_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Split submissions and hints into per-question sections"""
+        groups: Dict[str, Dict[str, Any]] = {}
+        
+        def section(entry: Dict[str, Any]) -> Dict[str, Any]:
+            key = entry.get("question_id") or entry.get("problem_description", "")[:80] or "unspecified"
+            return groups.setdefault(key, {"code_submissions": [], "hints_used": []})
+        
+        for submission in interview_data.get("code_submissions", []):
+            section(submission)["code_submissions"].append(submission)
+        for hint in interview_data.get("hints_used", []):
+            if hint.get("question_id") or hint.get("problem_description"):
+                section(hint)["hints_used"].append(hint)
+        return groups
+    
+    @staticmethod
+    async def _report_progress(on_progress: Optional[ProgressCallback], stage: str, done: int, total: int):
+        if on_progress is not None:
+            await on_progress(stage, done, total)
+    
+    async def _generate(
+        self,
+        prompt: str,
+        on_chunk: Optional[ChunkCallback] = None,
+        timeout: float = None,
+        priority: Priority = None,
+        call_type: str = "response",
+        interview_id: str = ""
+    ) -> str:
+        """Run a Gemini call, forwarding text chunks to on_chunk as they stream in.
+        
+        Concurrent calls with an identical prompt share one request. Only the
+        caller that started it receives streamed chunks; the others get the
+        complete text when it finishes. Every call is recorded in self.metrics
+        under call_type; failures are recorded as fallbacks since the public
+        methods answer them with a canned response, and cancelled calls are
+        recorded as cancelled. Tokens are only counted for the caller whose
+        request ran; the others are recorded as suppressed.
+        """
+        fingerprint = hashlib.sha256(prompt.encode()).hexdigest()
+        timings = CallTimings()
+        record = CallRecord(call_type, interview_id, input_tokens=estimate_tokens(prompt))
+        ran = False
+        
+        def call():
+            nonlocal ran
+            ran = True
+            return self._call_llm(prompt, on_chunk, timeout, priority, timings)
+        
+        try:
+            text = await self.single_flight.do(fingerprint, call)
+        except BaseException as e:
+            if not ran:
+                record.outcome, record.input_tokens = "suppressed", 0
+            elif isinstance(e, asyncio.CancelledError):
+                record.outcome = "cancelled"
+            else:
+                record.outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "fallback"
+            self._record(record, timings)
+            raise
+        if ran:
+            record.output_tokens = estimate_tokens(text)
+        else:
+            record.outcome, record.input_tokens = "suppressed", 0
+        self._record(record, timings, text)
+        return text
+    
+    def record_cached(self, call_type: str, interview_id: str, started: float = None):
+        """Record a request answered from the hint cache or speculation without an LLM call"""
+        timings = CallTimings()
+        if started is not None:
+            timings.started = started
+        self._record(CallRecord(call_type, interview_id, outcome="cached"), timings)
+    
+    def _record_unavailable(self, call_type: str, interview_id: str):
+        """Record a call answered with a canned response because no backend is configured"""
+        self.metrics.record(CallRecord(call_type, interview_id, outcome="unavailable"))
+    
+    def _record(self, record: CallRecord, timings: CallTimings, text: str = ""):
+        record.latency = time.monotonic() - timings.started
+        record.queue_wait = timings.queue_wait
+        record.ttft = timings.ttft
+        self.metrics.record(record)
+        log_ai_interaction(record.interview_id, record.call_type, len(text), {
+            "outcome": record.outcome,
+            "queue_wait": round(record.queue_wait, 3) if record.queue_wait is not None else None,
+            "ttft": round(record.ttft, 3) if record.ttft is not None else None,
+            "latency": round(record.latency, 3),
+            "input_tokens": record.input_tokens,
+            "output_tokens": record.output_tokens
+        })
+    
+    async def _call_llm(
+        self,
+        prompt: str,
+        on_chunk: Optional[ChunkCallback] = None,
+        timeout: float = None,
+        priority: Priority = None,
+        timings: CallTimings = None
+    ) -> str:
+        if on_chunk is None or not Config.STREAM_RESPONSES:
+            return await self.llm.generate(prompt, timeout, priority, timings)
+        
+        async def forward(delta: str):
+            # A vanished client must not abort a generation other callers share
+            try:
+                await on_chunk(delta)
+            except Exception as e:
+                print(f"Dropping streamed chunk: {e}")
+        
+        return await self.llm.stream(prompt, forward, timeout, priority, timings)
+    
+    def forget(self, interview_id: str):
+        """Drop per-interview state once the interview is over"""
+        self.conversation_history.pop(interview_id, None)
+        self.prompts.forget(interview_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Runtime statistics for the LLM layer"""
+        return {
+            "llm_client": self.llm.get_stats(),
+            "hint_cache": self.hint_cache.get_stats(),
+            "single_flight": self.single_flight.get_stats(),
+            "calls": self.metrics.get_stats()
+        }
     
     def _build_interview_prompt(
         self, 
         code: str, 
         analysis: Dict[str, Any], 
         context: List[Dict],
-        problem_description: str
+        problem_description: str,
+        interview_id: str = "",
+        output_format: str = ""
     ) -> str:
         """Build context-aware prompt for Gemini"""
-        return f"""You are CodeSage, an AI technical interviewer conducting a live coding interview. You are supportive, educational, and adaptive.
+        language = analysis.get('language', 'python')
+        analysis = self.prompts.compact_analysis(analysis)
+        # The example sets tone on the first turn; afterwards the conversation does
+        example = "" if context else f"""
+        Here is an example of a great interaction:
+        {FEW_SHOT_EXAMPLE}
+        """
+        
+        def render(code: str, conversation: str) -> str:
+            return f"""You are CodeSage, an AI technical interviewer conducting a live coding interview. You are supportive, educational, and adaptive.
 
         Problem: {problem_description}
         
         Candidate's Code:
-        ```{analysis.get('language', 'python')}
+        ```{language}
         {code}
         ```
         
         Analysis Results:
-        - Syntax Valid: {analysis.get('syntax', {}).get('valid', False)}
-        - Runtime Success: {analysis.get('runtime', {}).get('success', False)}
+        - Syntax Valid: {analysis.get('syntax_valid', False)}
+        - Runtime Success: {analysis.get('runtime_success', False)}
         - Overall Score: {analysis.get('overall_score', 0)}/100
-        - Time Complexity: {analysis.get('complexity', {}).get('time_complexity', 'Unknown')}
-        - Space Complexity: {analysis.get('complexity', {}).get('space_complexity', 'Unknown')}
-        - Quality Issues: {analysis.get('quality', {}).get('issues', [])}
-        - Execution Time: {analysis.get('runtime', {}).get('execution_time', 0):.3f}s
+        - Time Complexity: {analysis.get('time_complexity', 'Unknown')}
+        - Space Complexity: {analysis.get('space_complexity', 'Unknown')}
+        - Quality Issues: {analysis.get('quality_issues', [])}
+        - Execution Time: {analysis.get('execution_time', 0):.3f}s
         
-        Recent Conversation: {context[-3:] if context else 'No previous context'}
+        Conversation:
+        {conversation}
         
         Provide adaptive feedback:
         1. Acknowledge what's working well (be specific)
@@ -196,30 +509,15 @@ class GeminiInterviewer:
         3. Ask follow-up questions to probe understanding
         4. Discuss complexity and optimization opportunities
         5. Offer encouragement and guidance
-        
-        Here is an example of a great interaction:
-        Problem: Implement a function to find duplicates in an array.
-        Candidate's Code:
-        def find_duplicates(arr):
-            duplicates = []
-            for i in range(len(arr)):
-                for j in range(i+1, len(arr)):
-                    if arr[i] == arr[j]:
-                        duplicates.append(arr[i])
-            return duplicates
-        CodeSage: “Your logic is correct! I notice this has O(n²) complexity. For a million-element array, that’s a trillion operations. Can you think of a way to solve this in a single pass?”
-        Candidate: “Maybe using a hash set?”
-        CodeSage: “Exactly! Hash sets offer O(1) average lookup time. Want to try implementing that approach?”
-
+        {example}
         Be conversational, supportive, and educational. Adapt your response based on performance.
         Keep responses concise but helpful (2-4 sentences max).
         If the code has issues, guide them toward the solution without giving it away.
-        If the code is good, challenge them with follow-up questions or optimizations.
+        If the code is good, praise it briefly, then challenge them with an optimization, ask them to explain it in a different way, or ask for a potential pitfall of their approach.
+        {output_format}"""
         
-        Instead of just praising, you could instruct it to ask for clarification or a different perspective.
-        If the code is good, praise it briefly, then ask them to explain it in a different way or describe a potential pitfall of their approach. For example: 'That's a great solution. Can you explain it to me as if I were a new developer who has never seen a hash map before?
-        
-        """
+        conversation = self.prompts.conversation(interview_id, context)
+        return self.prompts.fit("response", render, code, conversation)
     
     def _get_fallback_response(self, analysis: Dict[str, Any]) -> str:
         """Fallback responses when Gemini API fails"""
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+import hashlib
+import re
+import time
+from ..config import Config
+
+HintKey = Tuple[str, int, str]
+
+def normalize_code(code: str) -> str:
+    """Collapse whitespace and drop blank lines so cosmetic edits share a fingerprint"""
+    lines = (re.sub(r"\s+", " ", line).strip() for line in code.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def code_fingerprint(code: str) -> str:
+    """Short stable hash of the normalized code"""
+    return hashlib.sha256(normalize_code(code).encode()).hexdigest()[:16]
+
+class HintCache:
+    """LRU cache of generated hints with a time-to-live per entry"""
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None):
+        self.max_entries = max_entries or Config.HINT_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or Config.HINT_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[HintKey, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(question_id: str, hint_level: int, code: str) -> HintKey:
+        return (question_id, hint_level, code_fingerprint(code))
+
+    def get(self, key: HintKey) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, hint = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return hint
+
+    def set(self, key: HintKey, hint: str):
+        self._entries[key] = (time.monotonic(), hint)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,82 @@
+"""Filters, cursors and field projection for paged interview listings.
+
+Pages are ordered newest first by (created_at, id). A cursor encodes the
+last row of a page, so the next page starts right after it however many
+interviews exist or are added meanwhile.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from ..models.interview import Interview
+from ..utils.serialization import dumps, loads
+
+# Fields returned when no projection is requested
+SUMMARY_FIELDS = (
+    "id", "candidate_name", "difficulty", "category", "status",
+    "created_at", "started_at", "completed_at", "current_question"
+)
+
+def summarize(interview: Interview) -> Dict[str, Any]:
+    return interview.model_dump(mode="json", include=set(SUMMARY_FIELDS))
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Requested fields, or None for the summary; ValueError for unknown ones"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in Interview.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+def needs_record(fields: Optional[List[str]]) -> bool:
+    """Whether a projection needs the full record rather than the summary"""
+    return fields is not None and any(field not in SUMMARY_FIELDS for field in fields)
+
+def project(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    return {field: record.get(field) for field in (fields or SUMMARY_FIELDS)}
+
+def local_time(value: Optional[datetime]) -> Optional[datetime]:
+    # Interviews are stamped with naive local times
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+class InterviewFilter:
+    def __init__(
+        self,
+        status: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        candidate: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ):
+        self.status = status
+        self.difficulty = difficulty
+        self.candidate = candidate
+        self.created_after = local_time(created_after)
+        self.created_before = local_time(created_before)
+
+    def matches(self, summary: Dict[str, Any]) -> bool:
+        created_at = summary["created_at"]
+        return (
+            (self.status is None or summary["status"] == self.status)
+            and (self.difficulty is None or summary["difficulty"] == self.difficulty)
+            and (self.candidate is None or summary["candidate_name"] == self.candidate)
+            and (self.created_after is None or created_at >= self.created_after.isoformat())
+            and (self.created_before is None or created_at < self.created_before.isoformat())
+        )
+
+def encode_cursor(created_at: str, interview_id: str) -> str:
+    return urlsafe_b64encode(dumps([created_at, interview_id])).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(created_at, id) of the last row already returned; ValueError if malformed"""
+    if not cursor:
+        return None
+    try:
+        created_at, interview_id = loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        datetime.fromisoformat(created_at)
+        return str(created_at), str(interview_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
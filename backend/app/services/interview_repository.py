@@ -0,0 +1,125 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from ..config import Config
+from ..models.interview import Interview
+from ..utils.serialization import dumps, loads
+from .interview_query import InterviewFilter, decode_cursor, encode_cursor, needs_record, project, summarize
+from .state_store import StateStore, get_store, store_key
+
+# Summary fields with a secondary index, most selective first
+INDEXED_FIELDS = (("candidate", "candidate_name"), ("status", "status"), ("difficulty", "difficulty"))
+
+class InterviewRepository:
+    """Interview records kept in the shared state store.
+
+    Records are stored as JSON, so every worker sees the same interviews.
+    Changes to a loaded Interview are only visible elsewhere after save().
+    Each record also has a small summary and entries in sorted-set indexes
+    scored by creation time, one for all interviews and one per status,
+    difficulty and candidate, which listing pages walk instead of loading
+    every record.
+    """
+
+    def __init__(self, store: StateStore = None):
+        self.store = store or get_store()
+        self.index_key = store_key("interviews")
+
+    @staticmethod
+    def _key(interview_id: str) -> str:
+        return store_key("interview", interview_id)
+
+    @staticmethod
+    def _summary_key(interview_id: str) -> str:
+        return store_key("interview_summary", interview_id)
+
+    @staticmethod
+    def _sorted_key(field: str = None, value: str = None) -> str:
+        return store_key("interviews_by_created", field, value) if field else store_key("interviews_by_created")
+
+    async def get(self, interview_id: str) -> Optional[Interview]:
+        data = await self.store.get(self._key(interview_id))
+        return Interview.model_validate_json(data) if data is not None else None
+
+    async def save(self, interview: Interview):
+        summary = summarize(interview)
+        previous = await self.store.get(self._summary_key(interview.id))
+        await self.store.set(self._key(interview.id), interview.model_dump_json())
+        await self.store.set(self._summary_key(interview.id), dumps(summary).decode())
+        await self.store.sadd(self.index_key, interview.id)
+
+        score = interview.created_at.timestamp()
+        await self.store.zadd(self._sorted_key(), interview.id, score)
+        previous = loads(previous) if previous is not None else {}
+        for field, column in INDEXED_FIELDS:
+            if previous.get(column) not in (None, summary[column]):
+                await self.store.zrem(self._sorted_key(field, previous[column]), interview.id)
+            await self.store.zadd(self._sorted_key(field, summary[column]), interview.id, score)
+
+    async def list(self) -> List[Interview]:
+        ids = sorted(await self.store.smembers(self.index_key))
+        records = await self.store.mget([self._key(interview_id) for interview_id in ids])
+        return [Interview.model_validate_json(data) for data in records if data is not None]
+
+    async def list_page(
+        self,
+        filters: InterviewFilter,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of interviews, newest first, and the cursor for the next page"""
+        after = decode_cursor(cursor)
+        # Walk the most selective index; other filters are checked on the summaries
+        index = self._sorted_key()
+        for field, _ in INDEXED_FIELDS:
+            if getattr(filters, field) is not None:
+                index = self._sorted_key(field, getattr(filters, field))
+                break
+        max_score = float("inf")
+        if after is not None:
+            max_score = datetime.fromisoformat(after[0]).timestamp()
+        if filters.created_before is not None:
+            max_score = min(max_score, filters.created_before.timestamp())
+        min_score = filters.created_after.timestamp() if filters.created_after is not None else float("-inf")
+
+        summaries: List[Dict[str, Any]] = []
+        offset = 0
+        batch = limit + 1
+        while len(summaries) <= limit:
+            entries = await self.store.zrevrangebyscore(index, max_score, min_score, offset, batch)
+            offset += len(entries)
+            ids = [member for member, _ in entries]
+            for data in await self.store.mget([self._summary_key(interview_id) for interview_id in ids]):
+                if data is None:
+                    continue
+                summary = loads(data)
+                if after is not None and (summary["created_at"], summary["id"]) >= after:
+                    continue
+                if filters.matches(summary):
+                    summaries.append(summary)
+            if len(entries) < batch:
+                break
+            # Other filters may reject most rows; read further ahead each round
+            batch = min(batch * 2, 1000)
+
+        page = summaries[:limit]
+        if needs_record(fields):
+            records = await self.store.mget([self._key(summary["id"]) for summary in page])
+            page = [loads(data) for data in records if data is not None]
+        next_cursor = None
+        if len(summaries) > limit:
+            next_cursor = encode_cursor(summaries[limit - 1]["created_at"], summaries[limit - 1]["id"])
+        return [project(record, fields) for record in page], next_cursor
+
+    async def aclose(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": "store"}
+
+def create_interview_repository():
+    """Repository selected by INTERVIEW_BACKEND"""
+    if Config.INTERVIEW_BACKEND == "sqlite":
+        from .sqlite_repository import SQLiteInterviewRepository
+        return SQLiteInterviewRepository()
+    return InterviewRepository()
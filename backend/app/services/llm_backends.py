@@ -0,0 +1,216 @@
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import json
+import random
+from ..config import Config
+
+class LLMBackendError(Exception):
+    """A backend failed to produce a response"""
+
+class LLMBackend:
+    """Text generation backend used by LLMClient"""
+
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    async def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield text chunks as they are produced"""
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through the library's native async API.
+
+    The library shares one grpc_asyncio channel per process, so HTTP/2
+    connections are reused across calls.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = None):
+        if Config.GEMINI_API_KEY:
+            import google.generativeai as genai
+            genai.configure(api_key=Config.GEMINI_API_KEY, transport="grpc_asyncio")
+            self.model = genai.GenerativeModel(model_name or Config.GEMINI_MODEL)
+        else:
+            self.model = None
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            try:
+                delta = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata only)
+                continue
+            if delta:
+                yield delta
+
+# Canned answers chosen by what the prompt asks for, checked in order
+DEFAULT_STUB_RESPONSES = {
+    "Respond with only a JSON object": json.dumps({
+        "feedback": "Your approach works. What is its time complexity, and could a hash map bring it down?",
+        "follow_up_question": "How would your solution behave if the input had a million elements?",
+        "hints": [
+            "Think about which values you need to remember as you scan the input.",
+            "A hash map can answer 'have I seen this before?' in O(1) on average.",
+            "Store each value's index in a dict while iterating once, checking for the complement first."
+        ]
+    }),
+    # Each marker is a phrase only its own prompt builder uses
+    "Your Hint:": "Think about which values you need to remember as you scan the input.",
+    "Generate a follow-up question based on": "How would your solution behave if the input had a million elements?",
+    "Summarize the candidate's work on one interview question": (
+        "The candidate first wrote a correct brute-force solution with nested loops, O(n^2) time and O(1) space. "
+        "After one hint about remembering seen values, they switched to a single pass with a hash map, "
+        "reaching O(n) time and O(n) space, and explained the trade-off clearly. "
+        "They tested the happy path but only checked empty input and duplicates after being prompted. "
+        "Two hints were used, both at the first level, and the final solution passed every test case."
+    ),
+    "Generate a comprehensive performance report": (
+        "Overall, the candidate showed a solid grasp of the fundamentals and improved steadily. "
+        "Strengths: clear code structure and good use of hints. "
+        "Areas for improvement: state time and space complexity unprompted and test edge cases earlier."
+    ),
+    "": (
+        "Nice progress! Your logic is on the right track. "
+        "Can you walk me through the time complexity and think about whether a different data structure could help?"
+    )
+}
+
+class StubBackend(LLMBackend):
+    """Offline stand-in for Gemini with realistic, configurable timing.
+
+    Time to first token is drawn from a fixed, uniform or lognormal
+    distribution around latency_ms. Streamed responses then arrive in chunks
+    of chunk_chars every chunk_delay_ms, and a fraction error_rate of calls
+    fails with LLMBackendError.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency_ms: float = None,
+        distribution: str = None,
+        spread: float = None,
+        chunk_chars: int = None,
+        chunk_delay_ms: float = None,
+        error_rate: float = None,
+        responses: Dict[str, str] = None,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = Config.LLM_STUB_LATENCY_MS if latency_ms is None else latency_ms
+        self.distribution = distribution or Config.LLM_STUB_LATENCY_DISTRIBUTION
+        self.spread = Config.LLM_STUB_LATENCY_SPREAD if spread is None else spread
+        self.chunk_chars = chunk_chars or Config.LLM_STUB_CHUNK_CHARS
+        self.chunk_delay_ms = Config.LLM_STUB_CHUNK_DELAY_MS if chunk_delay_ms is None else chunk_delay_ms
+        self.error_rate = Config.LLM_STUB_ERROR_RATE if error_rate is None else error_rate
+        self.responses = responses or self._load_responses()
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    @staticmethod
+    def _load_responses() -> Dict[str, str]:
+        if not Config.LLM_STUB_RESPONSES_FILE:
+            return DEFAULT_STUB_RESPONSES
+        with open(Config.LLM_STUB_RESPONSES_FILE) as f:
+            return {**json.load(f), **{"": DEFAULT_STUB_RESPONSES[""]}}
+
+    def response_for(self, prompt: str) -> str:
+        for marker, response in self.responses.items():
+            if marker in prompt:
+                return response
+        return DEFAULT_STUB_RESPONSES[""]
+
+    def sample_latency(self) -> float:
+        """Seconds until the first token"""
+        base = self.latency_ms / 1000
+        if self.distribution == "fixed":
+            return base
+        if self.distribution == "uniform":
+            return max(self._random.uniform(base * (1 - self.spread), base * (1 + self.spread)), 0)
+        # lognormal: latency_ms is the median, spread is sigma
+        return self._random.lognormvariate(0, self.spread) * base
+
+    def _chunks(self, text: str):
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    async def _start(self):
+        self.calls += 1
+        await asyncio.sleep(self.sample_latency())
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            raise LLMBackendError("Simulated LLM failure")
+
+    async def generate(self, prompt: str) -> str:
+        await self._start()
+        text = self.response_for(prompt)
+        # A complete response costs the same generation time as a streamed one
+        await asyncio.sleep(max(len(self._chunks(text)) - 1, 0) * self.chunk_delay_ms / 1000)
+        return text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        await self._start()
+        for i, chunk in enumerate(self._chunks(self.response_for(prompt))):
+            if i:
+                await asyncio.sleep(self.chunk_delay_ms / 1000)
+            yield chunk
+
+class HTTPStubBackend(LLMBackend):
+    """Client for the stub server in llm_stub_server, for out-of-process load tests"""
+
+    name = "stub_http"
+
+    def __init__(self, base_url: str = None):
+        import httpx
+        self.base_url = (base_url or Config.LLM_STUB_URL).rstrip("/")
+        # One pooled client so connections are reused across calls
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=None,
+            limits=httpx.Limits(max_connections=Config.LLM_MAX_CONCURRENCY * 2)
+        )
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.client.post("/generate", json={"prompt": prompt})
+        if response.status_code != 200:
+            raise LLMBackendError(f"Stub server returned {response.status_code}")
+        return response.json()["text"]
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        async with self.client.stream("POST", "/stream", json={"prompt": prompt}) as response:
+            if response.status_code != 200:
+                raise LLMBackendError(f"Stub server returned {response.status_code}")
+            async for delta in response.aiter_text():
+                if delta:
+                    yield delta
+
+    async def aclose(self):
+        await self.client.aclose()
+
+def create_backend(name: str = None) -> LLMBackend:
+    """Build the backend selected by LLM_BACKEND"""
+    name = name or Config.LLM_BACKEND
+    if name == "stub":
+        return StubBackend()
+    if name == "stub_http":
+        return HTTPStubBackend()
+    return GeminiBackend()
@@ -0,0 +1,218 @@
+from typing import Callable, Awaitable, Optional
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from ..config import Config
+from .resilience import CircuitBreaker, LatencyTracker, hedged
+from .rate_limiter import PriorityRateLimiter, Priority, llm_priority
+from .prompt_builder import estimate_tokens
+from .llm_backends import LLMBackend, create_backend
+
+# Receives each text chunk as it arrives from a streaming generation
+ChunkCallback = Callable[[str], Awaitable[None]]
+
+class CallTimings:
+    """Timing breakdown of one call, filled in by LLMClient as it progresses"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.queue_wait: Optional[float] = None
+        self.ttft: Optional[float] = None
+
+    def admitted(self):
+        """Rate-limit budget and a concurrency slot were granted"""
+        if self.queue_wait is None:
+            self.queue_wait = time.monotonic() - self.started
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.monotonic() - self.started
+
+class LLMClient:
+    """Async LLM client with a bounded number of in-flight calls and per-call deadlines.
+
+    Generation is delegated to an LLMBackend (Gemini by default, or the
+    offline stub selected with LLM_BACKEND), all of which are natively async,
+    so no thread-pool workers are tied up waiting on the network. A circuit
+    breaker fails calls fast while the API is down; it only counts failures
+    of calls that got a slot, so local queueing cannot open it. Complete
+    (non-streamed) calls can be hedged with one duplicate request once they
+    run past the observed p95 latency.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend = None,
+        max_concurrency: int = None,
+        timeout: float = None,
+        limiter: PriorityRateLimiter = None
+    ):
+        self.backend = backend or create_backend()
+        self.max_concurrency = max_concurrency or Config.LLM_MAX_CONCURRENCY
+        self.timeout = timeout or Config.LLM_TIMEOUT_SECONDS
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.limiter = limiter or PriorityRateLimiter()
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(
+            probe=self._probe,
+            failure_threshold=Config.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_seconds=Config.LLM_BREAKER_RESET_SECONDS
+        )
+        self.calls = 0
+        self.attempts = 0
+        self.queue_timeouts = 0
+
+    @property
+    def available(self) -> bool:
+        return self.backend.available
+
+    async def generate(
+        self,
+        prompt: str,
+        timeout: float = None,
+        priority: Priority = None,
+        timings: CallTimings = None
+    ) -> str:
+        """Generate a complete response within the deadline, including time queued for a slot.
+
+        For a complete response the first token arrives together with the
+        whole text. A hedged duplicate is a request of its own and is charged
+        to the budget like one.
+        """
+        self.breaker.check()
+        tokens = estimate_tokens(prompt)
+        timings = timings or CallTimings()
+        started = 0
+
+        async def attempt() -> str:
+            nonlocal started
+            started += 1
+            if started > 1:
+                await self.limiter.acquire(tokens, priority)
+            return await self._attempt(prompt, timings)
+
+        try:
+            text = await self._admit(lambda: hedged(attempt, self._hedge_delay()), tokens, priority, timeout)
+        except Exception:
+            self._record_failure(timings)
+            raise
+        self.breaker.record_success()
+        self.limiter.consume(estimate_tokens(text))
+        return text
+
+    async def stream(
+        self,
+        prompt: str,
+        on_chunk: ChunkCallback,
+        timeout: float = None,
+        priority: Priority = None,
+        timings: CallTimings = None
+    ) -> str:
+        """Generate a response, forwarding text chunks to on_chunk as they arrive"""
+        self.breaker.check()
+        timings = timings or CallTimings()
+        try:
+            text = await self._admit(
+                lambda: self._stream_in_slot(prompt, on_chunk, timings),
+                estimate_tokens(prompt),
+                priority,
+                timeout
+            )
+        except Exception:
+            self._record_failure(timings)
+            raise
+        self.breaker.record_success()
+        self.limiter.consume(estimate_tokens(text))
+        return text
+
+    async def _admit(self, call: Callable[[], Awaitable[str]], tokens: int, priority: Priority, timeout: float) -> str:
+        """Wait for rate-limit budget, then run call under the deadline.
+
+        Report work waits for budget before its deadline starts, so it is
+        delayed rather than failed. Interactive and speculative calls queue
+        inside the deadline, so a user is never kept waiting past it.
+        """
+        priority = llm_priority.get() if priority is None else priority
+        timeout = timeout or self.timeout
+        if priority >= Priority.REPORT:
+            await self.limiter.acquire(tokens, priority)
+            self.calls += 1
+            return await asyncio.wait_for(call(), timeout)
+
+        async def admitted() -> str:
+            await self.limiter.acquire(tokens, priority)
+            self.calls += 1
+            return await call()
+
+        return await asyncio.wait_for(admitted(), timeout)
+
+    async def _attempt(self, prompt: str, timings: CallTimings = None) -> str:
+        async with self._slot(timings):
+            self.attempts += 1
+            started = time.monotonic()
+            text = await self.backend.generate(prompt)
+            self.latency.record(time.monotonic() - started)
+            if timings is not None:
+                timings.first_token()
+            return text
+
+    async def _stream_in_slot(self, prompt: str, on_chunk: ChunkCallback, timings: CallTimings = None) -> str:
+        async with self._slot(timings):
+            self.attempts += 1
+            return await self._stream(prompt, on_chunk, timings)
+
+    def _record_failure(self, timings: CallTimings):
+        # A call that timed out still waiting for budget or a slot says nothing about the
+        # backend; only failures after admission count toward opening the circuit
+        if timings.queue_wait is not None:
+            self.breaker.record_failure()
+        else:
+            self.queue_timeouts += 1
+
+    def _hedge_delay(self):
+        if not Config.LLM_HEDGE_ENABLED:
+            return None
+        return self.latency.percentile(Config.LLM_HEDGE_PERCENTILE)
+
+    async def _probe(self):
+        """Minimal request used to detect that the API has recovered"""
+        await asyncio.wait_for(
+            self.backend.generate("Reply with OK."),
+            Config.LLM_BREAKER_PROBE_TIMEOUT_SECONDS
+        )
+
+    async def _stream(self, prompt: str, on_chunk: ChunkCallback, timings: CallTimings = None) -> str:
+        chunks = []
+        async for delta in self.backend.stream(prompt):
+            if timings is not None:
+                timings.first_token()
+            chunks.append(delta)
+            await on_chunk(delta)
+        return "".join(chunks)
+
+    @asynccontextmanager
+    async def _slot(self, timings: CallTimings = None):
+        """Hold one of the client's concurrency permits for the duration of a call"""
+        async with self._semaphore:
+            if timings is not None:
+                timings.admitted()
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "timeout_seconds": self.timeout,
+            "calls": self.calls,
+            "hedged_requests": max(self.attempts - self.calls, 0),
+            "queue_timeouts": self.queue_timeouts,
+            "hedge_after_seconds": self._hedge_delay(),
+            "circuit_breaker": self.breaker.get_stats(),
+            "rate_limiter": self.limiter.get_stats()
+        }
@@ -0,0 +1,187 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import bisect
+from ..config import Config
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 45.0, 90.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1000, 2000, 4000, 8000, 16000)
+
+# suppressed: shared another caller's identical in-flight request, so no tokens
+# unavailable: answered with a canned response because no backend is configured
+# cached: answered from the hint cache or speculation without a request
+# cancelled: the caller went away, e.g. speculation for code that changed
+OUTCOMES = ("ok", "fallback", "timeout", "cancelled", "suppressed", "unavailable", "cached")
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs, ending with +Inf"""
+        pairs, running = [], 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += count
+            pairs.append((str(bound), running))
+        return pairs
+
+class CallRecord:
+    """Measurements of one GeminiInterviewer call"""
+
+    def __init__(
+        self,
+        call_type: str,
+        interview_id: str = "",
+        outcome: str = "ok",
+        queue_wait: Optional[float] = None,
+        ttft: Optional[float] = None,
+        latency: Optional[float] = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0
+    ):
+        self.call_type = call_type
+        self.interview_id = interview_id
+        self.outcome = outcome
+        self.queue_wait = queue_wait
+        self.ttft = ttft
+        self.latency = latency
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+class LLMMetrics:
+    """Latency, token and cost accounting for LLM calls.
+
+    Histograms are kept per call type for the /metrics endpoint. Totals are
+    also kept per interview, bounded to the most recent LLM_METRICS_MAX_INTERVIEWS
+    interviews, so the usage of a single interview can be looked up.
+    """
+
+    def __init__(self, max_interviews: int = None):
+        self.max_interviews = max_interviews or Config.LLM_METRICS_MAX_INTERVIEWS
+        self.calls: Dict[Tuple[str, str], int] = {}
+        self.queue_wait: Dict[str, Histogram] = {}
+        self.ttft: Dict[str, Histogram] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.input_tokens: Dict[str, Histogram] = {}
+        self.output_tokens: Dict[str, Histogram] = {}
+        self.interviews: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+
+    def record(self, record: CallRecord):
+        call_type = record.call_type
+        key = (call_type, record.outcome)
+        self.calls[key] = self.calls.get(key, 0) + 1
+
+        for series, buckets, value in (
+            (self.queue_wait, LATENCY_BUCKETS, record.queue_wait),
+            (self.ttft, LATENCY_BUCKETS, record.ttft),
+            (self.latency, LATENCY_BUCKETS, record.latency),
+            (self.input_tokens, TOKEN_BUCKETS, record.input_tokens or None),
+            (self.output_tokens, TOKEN_BUCKETS, record.output_tokens or None)
+        ):
+            if value is not None:
+                if call_type not in series:
+                    series[call_type] = Histogram(buckets)
+                series[call_type].observe(value)
+
+        if record.interview_id:
+            self._add_to_interview(record)
+
+    def _add_to_interview(self, record: CallRecord):
+        totals = self.interviews.get(record.interview_id)
+        if totals is None:
+            totals = {"calls": 0, "fallbacks": 0, "timeouts": 0, "cancelled": 0, "suppressed": 0,
+                      "unavailable": 0, "cached": 0, "latency_seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+            self.interviews[record.interview_id] = totals
+        self.interviews.move_to_end(record.interview_id)
+        while len(self.interviews) > self.max_interviews:
+            self.interviews.popitem(last=False)
+
+        if record.outcome in ("suppressed", "unavailable", "cached"):
+            # No backend request of its own
+            totals[record.outcome] += 1
+            return
+        totals["calls"] += 1
+        if record.outcome == "fallback":
+            totals["fallbacks"] += 1
+        elif record.outcome == "timeout":
+            totals["timeouts"] += 1
+        elif record.outcome == "cancelled":
+            totals["cancelled"] += 1
+        totals["latency_seconds"] += record.latency or 0.0
+        totals["input_tokens"] += record.input_tokens
+        totals["output_tokens"] += record.output_tokens
+        by_type = totals.setdefault("calls_by_type", {})
+        by_type[record.call_type] = by_type.get(record.call_type, 0) + 1
+
+    @staticmethod
+    def estimate_cost(input_tokens: int, output_tokens: int) -> float:
+        """Estimated spend in USD from the configured per-million-token prices"""
+        return (
+            input_tokens * Config.LLM_INPUT_COST_PER_MILLION
+            + output_tokens * Config.LLM_OUTPUT_COST_PER_MILLION
+        ) / 1_000_000
+
+    def interview_usage(self, interview_id: str) -> Optional[Dict[str, float]]:
+        totals = self.interviews.get(interview_id)
+        if totals is None:
+            return None
+        usage = dict(totals)
+        usage["latency_seconds"] = round(usage["latency_seconds"], 3)
+        usage["estimated_cost_usd"] = round(
+            self.estimate_cost(totals["input_tokens"], totals["output_tokens"]), 6
+        )
+        return usage
+
+    def render_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP codesage_llm_calls_total LLM calls by call type and outcome.",
+            "# TYPE codesage_llm_calls_total counter"
+        ]
+        for (call_type, outcome), count in sorted(self.calls.items()):
+            lines.append(f'codesage_llm_calls_total{{call_type="{call_type}",outcome="{outcome}"}} {count}')
+
+        for name, help_text, series in (
+            ("codesage_llm_queue_wait_seconds", "Time spent waiting for rate-limit budget and a concurrency slot.", self.queue_wait),
+            ("codesage_llm_time_to_first_token_seconds", "Time until the first response text was available.", self.ttft),
+            ("codesage_llm_latency_seconds", "Total call latency as seen by the caller.", self.latency),
+            ("codesage_llm_input_tokens", "Estimated prompt size in tokens.", self.input_tokens),
+            ("codesage_llm_output_tokens", "Estimated response size in tokens.", self.output_tokens)
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for call_type, histogram in sorted(series.items()):
+                for le, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{call_type="{call_type}",le="{le}"}} {count}')
+                lines.append(f'{name}_sum{{call_type="{call_type}"}} {round(histogram.sum, 6)}')
+                lines.append(f'{name}_count{{call_type="{call_type}"}} {histogram.count}')
+
+        input_total = sum(h.sum for h in self.input_tokens.values())
+        output_total = sum(h.sum for h in self.output_tokens.values())
+        lines += [
+            "# HELP codesage_llm_estimated_cost_usd_total Estimated LLM spend from configured token prices.",
+            "# TYPE codesage_llm_estimated_cost_usd_total counter",
+            f"codesage_llm_estimated_cost_usd_total {round(self.estimate_cost(input_total, output_total), 6)}"
+        ]
+        return "\n".join(lines) + "\n"
+
+    def get_stats(self) -> dict:
+        calls: Dict[str, Dict[str, int]] = {}
+        for (call_type, outcome), count in self.calls.items():
+            calls.setdefault(call_type, {o: 0 for o in OUTCOMES})[outcome] = count
+        return {
+            "calls": calls,
+            "mean_latency_seconds": {
+                call_type: round(h.sum / h.count, 3) for call_type, h in self.latency.items() if h.count
+            },
+            "interviews_tracked": len(self.interviews)
+        }
@@ -0,0 +1,51 @@
+"""Local Gemini stand-in served over HTTP for load tests.
+
+Run with:  python -m app.services.llm_stub_server
+and point the API at it with LLM_BACKEND=stub_http. Timing, error rate and
+canned responses come from the LLM_STUB_* settings.
+"""
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import uvicorn
+
+from ..config import Config
+from .llm_backends import StubBackend, LLMBackendError
+
+app = FastAPI(title="CodeSage LLM stub")
+backend = StubBackend()
+
+class GenerateRequest(BaseModel):
+    prompt: str
+
+@app.post("/generate")
+async def generate(request: GenerateRequest):
+    try:
+        return {"text": await backend.generate(request.prompt)}
+    except LLMBackendError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.post("/stream")
+async def stream(request: GenerateRequest):
+    chunks = backend.stream(request.prompt)
+    try:
+        # Surface latency and simulated failures before the response starts
+        first = await chunks.__anext__()
+    except LLMBackendError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except StopAsyncIteration:
+        return StreamingResponse(iter(()), media_type="text/plain")
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(body(), media_type="text/plain")
+
+@app.get("/stats")
+async def stats():
+    return {"calls": backend.calls, "errors": backend.errors}
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=Config.LLM_STUB_PORT)
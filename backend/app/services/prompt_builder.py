@@ -0,0 +1,177 @@
+from collections import Counter
+from typing import Dict, Any, List, Callable, Iterable
+import json
+import math
+from ..config import Config
+
+# Roughly four characters per token for English text and code. Counting
+# exactly would need a count_tokens round trip to the API for every prompt.
+CHARS_PER_TOKEN = 4
+
+# Turns shown verbatim; older turns are folded into the rolling summary
+RECENT_TURNS = 3
+SUMMARY_LINE_CHARS = 120
+TURN_CHARS = 600
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of tokens in text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Trim text to max_tokens, keeping its head and tail and marking the cut"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(max_tokens, 0) * CHARS_PER_TOKEN
+    marker = "\n... [{} characters omitted] ...\n"
+    keep = max(max_chars - len(marker) - 8, 0)
+    head = text[:keep // 2]
+    tail = text[len(text) - (keep - keep // 2):] if keep else ""
+    return head + marker.format(len(text) - len(head) - len(tail)) + tail
+
+class PromptBuilder:
+    """Assembles Gemini prompts within a per-call token budget.
+
+    Older conversation turns are folded into a compact per-interview rolling
+    summary, so prompt size stays flat as an interview gets longer.
+    """
+
+    def __init__(self):
+        self.budgets = {
+            "response": Config.PROMPT_BUDGET_RESPONSE,
+            "hint": Config.PROMPT_BUDGET_HINT,
+            "follow_up": Config.PROMPT_BUDGET_FOLLOW_UP,
+            "report": Config.PROMPT_BUDGET_REPORT,
+            "report_section": Config.PROMPT_BUDGET_REPORT_SECTION
+        }
+        # interview_id -> {"summarized": turns folded so far, "lines": summary lines}
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+
+    def fit(self, call_type: str, render: Callable[[str, str], str], code: str, conversation: str = "") -> str:
+        """Render a prompt, shrinking the code and then the conversation until it fits the budget"""
+        budget = self.budgets[call_type]
+        prompt = render(code, conversation)
+        if estimate_tokens(prompt) <= budget:
+            return prompt
+
+        # Give the code whatever the rest of the prompt leaves over
+        overhead = estimate_tokens(render("", conversation))
+        code = truncate_to_tokens(code, max(budget - overhead, budget // 4))
+        prompt = render(code, conversation)
+        if estimate_tokens(prompt) <= budget or not conversation:
+            return prompt
+
+        overhead = estimate_tokens(render(code, ""))
+        conversation = truncate_to_tokens(conversation, max(budget - overhead, 0))
+        return render(code, conversation)
+
+    def conversation(self, interview_id: str, context: Iterable[Dict]) -> str:
+        """Rolling summary of older turns followed by the most recent turns verbatim.
+        
+        context may be a bounded buffer; its total_appended count, when
+        present, tells how many turns have happened including dropped ones.
+        """
+        total_turns = getattr(context, "total_appended", None)
+        context = list(context)
+        if not context:
+            return "No previous context"
+        if total_turns is None:
+            total_turns = len(context)
+
+        older, recent = context[:-RECENT_TURNS], context[-RECENT_TURNS:]
+        older_total = total_turns - len(recent)
+        lines = []
+        summary = self._roll_summary(interview_id, older, older_total)
+        if summary:
+            lines.append(f"Earlier in the interview ({older_total} turns):")
+            lines.extend(f"- {line}" for line in summary)
+        lines.append("Recent turns:")
+        lines.extend(self._format_turn(turn, TURN_CHARS) for turn in recent)
+        return "\n".join(lines)
+
+    def forget(self, interview_id: str):
+        """Drop the rolling summary for an interview"""
+        self._summaries.pop(interview_id, None)
+
+    def _roll_summary(self, interview_id: str, older: List[Dict], older_total: int) -> List[str]:
+        if not interview_id:
+            return [self._format_turn(turn, SUMMARY_LINE_CHARS) for turn in older][-self._summary_lines():]
+
+        state = self._summaries.setdefault(interview_id, {"summarized": 0, "lines": []})
+        if older_total < state["summarized"]:
+            # History was reset underneath us; rebuild from what is left
+            state["summarized"], state["lines"] = 0, []
+        new_turns = min(older_total - state["summarized"], len(older))
+        for turn in older[len(older) - new_turns:]:
+            state["lines"].append(self._format_turn(turn, SUMMARY_LINE_CHARS))
+        state["summarized"] = older_total
+        del state["lines"][:-self._summary_lines()]
+        return state["lines"]
+
+    def _summary_lines(self) -> int:
+        return max(Config.PROMPT_SUMMARY_TOKENS * CHARS_PER_TOKEN // SUMMARY_LINE_CHARS, 1)
+
+    @staticmethod
+    def _format_turn(turn: Dict, max_chars: int) -> str:
+        speaker = "CodeSage" if turn.get("role") == "assistant" else "Candidate"
+        content = " ".join(str(turn.get("content", "")).split())
+        if len(content) > max_chars:
+            content = content[:max_chars - 3] + "..."
+        return f"{speaker}: {content}"
+
+    @staticmethod
+    def compact_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """The analysis fields the model actually uses"""
+        if not analysis:
+            return {}
+        runtime = analysis.get("runtime", {})
+        complexity = analysis.get("complexity", {})
+        return {
+            "syntax_valid": analysis.get("syntax", {}).get("valid", False),
+            "syntax_errors": analysis.get("syntax", {}).get("errors", [])[:3],
+            "runtime_success": runtime.get("success", False),
+            "runtime_error": str(runtime.get("error", ""))[:300],
+            "execution_time": round(runtime.get("execution_time", 0), 3),
+            "overall_score": analysis.get("overall_score", 0),
+            "time_complexity": complexity.get("time_complexity", "Unknown"),
+            "space_complexity": complexity.get("space_complexity", "Unknown"),
+            "quality_issues": analysis.get("quality", {}).get("issues", [])[:5]
+        }
+
+    def report_payload(
+        self,
+        interview_data: Dict[str, Any],
+        interview_id: str = "",
+        overhead_tokens: int = 0,
+        call_type: str = "report"
+    ) -> str:
+        """Compact JSON view of an interview that fits the call type's budget after overhead_tokens"""
+        submissions = list(interview_data.get("code_submissions", []))
+        hints = interview_data.get("hints_used", [])
+        history = list(interview_data.get("conversation_history", []))
+
+        payload = {
+            "code_submissions": len(submissions),
+            "score_progression": [s.get("analysis", {}).get("overall_score", 0) for s in submissions][-20:],
+            "hints_used": len(hints),
+            "hints_by_level": dict(Counter(str(h.get("hint_level", 1)) for h in hints)),
+            "submissions": [
+                {"language": s.get("language", "python"), **self.compact_analysis(s.get("analysis", {}))}
+                for s in submissions
+            ],
+            "conversation": self.conversation(interview_id, history)
+        }
+        if submissions:
+            payload["final_code"] = submissions[-1].get("code", "")
+
+        budget = self.budgets[call_type] - overhead_tokens
+        text = json.dumps(payload, default=str)
+        # Keep the final submissions in full detail and drop the oldest first
+        while estimate_tokens(text) > budget and len(payload["submissions"]) > 1:
+            payload["submissions"] = payload["submissions"][len(payload["submissions"]) // 2:]
+            payload["earlier_submissions_omitted"] = len(submissions) - len(payload["submissions"])
+            text = json.dumps(payload, default=str)
+        if estimate_tokens(text) > budget and "final_code" in payload:
+            overhead = estimate_tokens(json.dumps({**payload, "final_code": ""}, default=str))
+            payload["final_code"] = truncate_to_tokens(payload["final_code"], max(budget - overhead, 0))
+            text = json.dumps(payload, default=str)
+        return text
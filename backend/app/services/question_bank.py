@@ -0,0 +1,114 @@
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+import random
+from ..config import Config
+from ..models.interview import Question
+from ..utils.serialization import loads, type_adapter
+
+@lru_cache(maxsize=256)
+def _read_test_cases(path: str) -> Tuple[Dict[str, Any], ...]:
+    return tuple(type_adapter(List[Dict[str, Any]]).validate_json(Path(path).read_bytes()))
+
+class QuestionBank:
+    """Interview questions, loaded and validated once from QUESTION_BANK_PATH.
+
+    Questions are indexed by difficulty, by (difficulty, category) and by
+    tag in read-only tuples and id sets built at load time, so choosing
+    questions for an interview samples straight from an index instead of
+    scanning the bank; tag filters intersect id sets, starting from the
+    smallest, so their cost follows the number of matches. A question may name a test_cases_file, relative to
+    the bank, instead of listing test_cases; the file is only read when
+    the question is first selected.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or Config.QUESTION_BANK_PATH)
+        entries = loads(self.path.read_bytes())
+        test_case_files: Dict[str, str] = {}
+        for entry in entries:
+            test_cases_file = entry.pop("test_cases_file", None)
+            if test_cases_file:
+                test_case_files[entry["id"]] = str(self.path.parent / test_cases_file)
+                entry.setdefault("test_cases", [])
+        questions: List[Question] = type_adapter(List[Question]).validate_python(entries)
+
+        by_id: Dict[str, Question] = {}
+        by_difficulty: Dict[str, List[Question]] = {}
+        by_category: Dict[Tuple[str, str], List[Question]] = {}
+        by_tag: Dict[str, set] = {}
+        for question in questions:
+            if question.id in by_id:
+                raise ValueError(f"Duplicate question id {question.id} in {self.path}")
+            by_id[question.id] = question
+            by_difficulty.setdefault(question.difficulty.value, []).append(question)
+            by_category.setdefault((question.difficulty.value, question.category), []).append(question)
+            for tag in question.tags:
+                by_tag.setdefault(tag, set()).add(question.id)
+
+        self._by_id = MappingProxyType(by_id)
+        self._by_difficulty = MappingProxyType({key: tuple(items) for key, items in by_difficulty.items()})
+        self._by_category = MappingProxyType({key: tuple(items) for key, items in by_category.items()})
+        self._ids_by_difficulty: "MappingProxyType[str, FrozenSet[str]]" = MappingProxyType(
+            {key: frozenset(q.id for q in items) for key, items in by_difficulty.items()}
+        )
+        self._ids_by_category: "MappingProxyType[Tuple[str, str], FrozenSet[str]]" = MappingProxyType(
+            {key: frozenset(q.id for q in items) for key, items in by_category.items()}
+        )
+        self._by_tag: "MappingProxyType[str, FrozenSet[str]]" = MappingProxyType(
+            {tag: frozenset(ids) for tag, ids in by_tag.items()}
+        )
+        self._test_case_files = MappingProxyType(test_case_files)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, question_id: str) -> Optional[Question]:
+        question = self._by_id.get(question_id)
+        return self._with_test_cases(question) if question is not None else None
+
+    def candidates(self, difficulty: str, category: str = "all", tags: Sequence[str] = ()) -> Sequence[Question]:
+        """Questions of a difficulty, optionally in one category and carrying every given tag"""
+        if not tags:
+            if category == "all":
+                return self._by_difficulty.get(difficulty, ())
+            return self._by_category.get((difficulty, category), ())
+
+        if category == "all":
+            ids = self._ids_by_difficulty.get(difficulty, frozenset())
+        else:
+            ids = self._ids_by_category.get((difficulty, category), frozenset())
+        sets = sorted((self._by_tag.get(tag, frozenset()) for tag in tags), key=len)
+        wanted = sets[0].intersection(ids, *sets[1:])
+        return tuple(self._by_id[question_id] for question_id in wanted)
+
+    def select(self, difficulty: str, category: str = "all", tags: Sequence[str] = (), count: int = None) -> List[Question]:
+        """Up to count distinct questions chosen at random"""
+        pool = self.candidates(difficulty, category, tags)
+        chosen = random.sample(pool, min(count or Config.MAX_QUESTIONS, len(pool)))
+        return [self._with_test_cases(question) for question in chosen]
+
+    def _with_test_cases(self, question: Question) -> Question:
+        # A copy the caller may change without touching the bank's indexed question
+        path = self._test_case_files.get(question.id)
+        if path is None:
+            return question.model_copy(deep=True)
+        return question.model_copy(update={"test_cases": list(_read_test_cases(path))}, deep=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "questions": len(self._by_id),
+            "by_difficulty": {difficulty: len(items) for difficulty, items in self._by_difficulty.items()},
+            "tags": len(self._by_tag),
+            "lazy_test_cases": len(self._test_case_files)
+        }
+
+_question_bank: Optional[QuestionBank] = None
+
+def get_question_bank() -> QuestionBank:
+    """Process-wide question bank, loaded on first use"""
+    global _question_bank
+    if _question_bank is None:
+        _question_bank = QuestionBank()
+    return _question_bank
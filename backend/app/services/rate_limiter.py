@@ -0,0 +1,157 @@
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+from ..config import Config
+
+class Priority(IntEnum):
+    """LLM traffic classes; lower values are admitted first"""
+    INTERACTIVE = 0
+    SPECULATIVE = 1
+    REPORT = 2
+
+# Priority of LLM calls made from the current task when none is passed explicitly
+llm_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+class _Bucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+
+    def refill(self, elapsed: float):
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until the bucket holds amount"""
+        return max(amount - self.level, 0) / self.rate
+
+class PriorityRateLimiter:
+    """Process-wide requests/minute and tokens/minute budget shared by all Gemini calls.
+
+    Callers that do not fit the current budget are queued, not failed, and
+    the queue is served strictly by priority (interactive, then speculative,
+    then reports) and first-come within a priority. A request that fits the
+    budget is admitted at once unless a waiter of the same or a higher
+    priority is queued, so a large queued report never holds up live
+    traffic, and a new waiter wakes the dispatcher so it is considered
+    immediately. A budget of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: int = None, tokens_per_minute: int = None):
+        rpm = Config.LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        tpm = Config.LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.requests = _Bucket(rpm) if rpm > 0 else None
+        self.tokens = _Bucket(tpm) if tpm > 0 else None
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.granted = {p.name.lower(): 0 for p in Priority}
+        self.queued = {p.name.lower(): 0 for p in Priority}
+        self.total_wait_seconds = 0.0
+
+    async def acquire(self, tokens: int, priority: Priority = None):
+        """Wait until one request of the given token size fits the budget"""
+        if self.requests is None and self.tokens is None:
+            return
+        priority = llm_priority.get() if priority is None else priority
+        if self.tokens is not None:
+            tokens = min(tokens, self.tokens.capacity)
+
+        self._refill()
+        if self._fits(tokens) and not self._waiting_at(priority):
+            self._take(tokens)
+            self.granted[priority.name.lower()] += 1
+            return
+
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), tokens, future))
+        self.queued[priority.name.lower()] += 1
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        else:
+            # The new waiter may now be first in line or need less than the one being waited for
+            self._wakeup.set()
+
+        started = time.monotonic()
+        await future
+        self.total_wait_seconds += time.monotonic() - started
+        self.granted[priority.name.lower()] += 1
+
+    def consume(self, tokens: int):
+        """Charge tokens used after admission, such as the model's output"""
+        if self.tokens is not None:
+            self._refill()
+            self.tokens.level -= tokens
+
+    async def _dispatch(self):
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                # The waiter was cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            self._refill()
+            if self._fits(tokens):
+                heapq.heappop(self._waiters)
+                self._take(tokens)
+                future.set_result(None)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._wait_time(tokens))
+            except asyncio.TimeoutError:
+                pass
+
+    def _waiting_at(self, priority: Priority) -> bool:
+        """Whether a waiter of this or a higher priority is queued"""
+        return any(queued <= priority and not future.done() for queued, _, _, future in self._waiters)
+
+    def _refill(self):
+        now = time.monotonic()
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.refill(now - self._updated)
+        self._updated = now
+
+    def _fits(self, tokens: float) -> bool:
+        return (
+            (self.requests is None or self.requests.level >= 1)
+            and (self.tokens is None or self.tokens.level >= tokens)
+        )
+
+    def _take(self, tokens: float):
+        if self.requests is not None:
+            self.requests.level -= 1
+        if self.tokens is not None:
+            self.tokens.level -= tokens
+
+    def _wait_time(self, tokens: float) -> float:
+        waits = [0.01]
+        if self.requests is not None:
+            waits.append(self.requests.wait_for(1))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_for(tokens))
+        return max(waits)
+
+    def get_stats(self) -> dict:
+        self._refill()
+        waiting = {p.name.lower(): 0 for p in Priority}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                waiting[Priority(priority).name.lower()] += 1
+        return {
+            "requests_available": round(self.requests.level, 2) if self.requests else None,
+            "tokens_available": round(self.tokens.level) if self.tokens else None,
+            "waiting": waiting,
+            "queued": self.queued,
+            "granted": self.granted,
+            "total_wait_seconds": round(self.total_wait_seconds, 3)
+        }
@@ -0,0 +1,58 @@
+from typing import Any, Dict, List, Tuple
+from ..config import Config
+from ..utils.serialization import dumps, loads
+from .state_store import StateStore, get_store, store_key
+
+class ReplayLog:
+    """Numbers an interview's events and keeps the most recent ones for resuming clients.
+
+    Sequence numbers increase by one per event within an interview. The last
+    WS_REPLAY_BUFFER_SIZE events are kept in the state store, so a client
+    that reconnects, to this worker or another, can ask for everything after
+    the last sequence number it saw instead of repeating its requests.
+    The counter expires with the buffer, and with an unshared store it does
+    not survive a restart, so numbering can start again from 1; a client
+    that saw a number beyond the current one is told its numbering is stale.
+    """
+
+    def __init__(self, store: StateStore = None, size: int = None, ttl_seconds: float = None):
+        self.store = store or get_store()
+        self.size = size or Config.WS_REPLAY_BUFFER_SIZE
+        self.ttl_seconds = ttl_seconds or Config.WS_REPLAY_TTL_SECONDS
+        self.appended = 0
+        self.replayed = 0
+
+    @staticmethod
+    def _keys(interview_id: str) -> Tuple[str, str]:
+        return store_key("seq", interview_id), store_key("replay", interview_id)
+
+    async def append(self, interview_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Assign the event its sequence number and keep it for replay"""
+        seq_key, log_key = self._keys(interview_id)
+        event = {**event, "seq": await self.store.incr(seq_key, self.ttl_seconds)}
+        await self.store.append_capped(log_key, dumps(event).decode(), self.size, self.ttl_seconds)
+        self.appended += 1
+        return event
+
+    async def since(self, interview_id: str, last_seq: int) -> Tuple[List[Dict[str, Any]], bool, int]:
+        """Events after last_seq, whether they are complete, and the current sequence number.
+
+        If last_seq is beyond the current number the sequence was restarted;
+        every buffered event is then returned and the replay is incomplete.
+        """
+        seq_key, log_key = self._keys(interview_id)
+        current = int(await self.store.get(seq_key) or 0)
+        events = [loads(item) for item in await self.store.lrange(log_key)]
+        restarted = last_seq > current
+        after = 0 if restarted else last_seq
+        missed = sorted((event for event in events if event["seq"] > after), key=lambda event: event["seq"])
+        oldest = missed[0]["seq"] if missed else current + 1
+        self.replayed += len(missed)
+        return missed, not restarted and oldest <= last_seq + 1, current
+
+    def get_stats(self) -> dict:
+        return {
+            "buffer_size": self.size,
+            "appended": self.appended,
+            "replayed": self.replayed
+        }
@@ -0,0 +1,240 @@
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import uuid
+from ..config import Config
+from .gemini_service import GeminiInterviewer, REPORT_FAILED_MESSAGE
+
+# Receives job events: report_progress updates and the final performance_report
+JobListener = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class ReportJob:
+    def __init__(self, interview_id: str, version: str, interview_data: Dict[str, Any]):
+        self.id = str(uuid.uuid4())
+        self.interview_id = interview_id
+        self.version = version
+        self.interview_data = interview_data
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.report: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.listeners: List[JobListener] = []
+        # False for reports written without an LLM backend, which must not be reused
+        self.cacheable = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "interview_id": self.interview_id,
+            "version": self.version,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "report": self.report,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class ReportJobManager:
+    """Runs performance report generation as queued background jobs.
+
+    Jobs outlive the socket that requested them. Finished reports are
+    cached in memory and written to REPORTS_DIR, keyed by interview and a
+    version fingerprint of the interview data, so asking again for an
+    unchanged interview returns the stored report without an LLM call.
+    Placeholder reports produced while no backend is configured are
+    returned but never stored.
+    """
+
+    def __init__(self, gemini_service: GeminiInterviewer, workers: int = None):
+        self.gemini_service = gemini_service
+        self.workers = workers or Config.REPORT_WORKERS
+        self.reports_dir = Path(Config.REPORTS_DIR)
+        self.jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._active: Dict[tuple, ReportJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self.cache_hits = 0
+
+    @staticmethod
+    def version_of(interview_data: Dict[str, Any]) -> str:
+        """Fingerprint that changes whenever the interview gains new activity"""
+        parts = []
+        for key in ("code_submissions", "hints_used", "conversation_history"):
+            entries = list(interview_data.get(key, []))
+            parts.append(f"{key}:{len(entries)}:{entries[-1].get('timestamp', '') if entries else ''}")
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+    async def submit(self, interview_id: str, interview_data: Dict[str, Any], listener: JobListener = None) -> ReportJob:
+        """Queue a report for the interview's current state, reusing a running or finished one"""
+        version = self.version_of(interview_data)
+        key = (interview_id, version)
+
+        job = self._active.get(key)
+        if job is not None:
+            if listener:
+                job.listeners.append(listener)
+            return job
+
+        # Snapshot so the report reflects the interview as it was when requested
+        job = ReportJob(interview_id, version, copy.deepcopy(interview_data))
+        if listener:
+            job.listeners.append(listener)
+        # Registered before the cache lookup, so concurrent requests join this job
+        self._active[key] = job
+        try:
+            cached = await self._load_report(interview_id, version)
+        except BaseException:
+            self._active.pop(key, None)
+            raise
+        if cached is not None:
+            self._active.pop(key, None)
+            self.cache_hits += 1
+            job.status = job.stage = "completed"
+            job.progress = 1.0
+            job.report = cached
+            job.interview_data = {}
+            job.finished_at = datetime.now()
+            self._remember(job)
+            await self._broadcast(job, None)
+            return job
+
+        self._remember(job)
+        self._ensure_workers()
+        await self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self.jobs.get(job_id)
+
+    def _remember(self, job: ReportJob):
+        self.jobs[job.id] = job
+        while len(self.jobs) > Config.REPORT_JOBS_MAX:
+            self.jobs.popitem(last=False)
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.ensure_future(self._work()))
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._active.pop((job.interview_id, job.version), None)
+                job.interview_data = {}
+                self._queue.task_done()
+
+    async def _run(self, job: ReportJob):
+        job.status = "running"
+
+        async def on_progress(stage: str, done: int, total: int):
+            job.stage = stage
+            job.progress = done / total if total else 0.0
+            await self._broadcast(job, {
+                "type": "report_progress",
+                "job_id": job.id,
+                "stage": stage,
+                "progress": round(job.progress, 3)
+            })
+
+        try:
+            job.cacheable = self.gemini_service.llm.available
+            job.report = await self.gemini_service.build_performance_report(
+                job.interview_data, job.interview_id, on_progress
+            )
+            job.status = job.stage = "completed"
+            job.progress = 1.0
+            if job.cacheable:
+                await self._save_report(job)
+        except Exception as e:
+            print(f"Report job {job.id} failed: {e}")
+            job.status = job.stage = "failed"
+            job.error = str(e)
+            job.report = REPORT_FAILED_MESSAGE
+        job.finished_at = datetime.now()
+        await self._broadcast(job, None)
+
+    async def _broadcast(self, job: ReportJob, event: Optional[Dict[str, Any]]):
+        for listener in list(job.listeners):
+            await self._notify(job, listener, event)
+
+    @staticmethod
+    async def _notify(job: ReportJob, listener: JobListener, event: Dict[str, Any] = None):
+        event = event or {
+            "type": "performance_report",
+            "job_id": job.id,
+            "status": job.status,
+            "report": job.report
+        }
+        try:
+            await listener(event)
+        except Exception as e:
+            # The requesting socket may be gone; the job result is still kept
+            print(f"Report listener error: {e}")
+            if listener in job.listeners:
+                job.listeners.remove(listener)
+
+    def _report_path(self, interview_id: str, version: str) -> Path:
+        safe_id = "".join(c for c in interview_id if c.isalnum() or c in "-_")
+        return self.reports_dir / f"{safe_id}-{version}.json"
+
+    async def _load_report(self, interview_id: str, version: str) -> Optional[str]:
+        for job in reversed(self.jobs.values()):
+            if (
+                job.interview_id == interview_id and job.version == version
+                and job.status == "completed" and job.cacheable
+            ):
+                return job.report
+        path = self._report_path(interview_id, version)
+        loop = asyncio.get_event_loop()
+        try:
+            data = await loop.run_in_executor(None, path.read_text)
+        except OSError:
+            return None
+        try:
+            return json.loads(data).get("report")
+        except (ValueError, AttributeError) as e:
+            # Unreadable, e.g. cut short by a crash; regenerate it and overwrite the file
+            print(f"Ignoring corrupt report {path}: {e}")
+            return None
+
+    async def _save_report(self, job: ReportJob):
+        path = self._report_path(job.interview_id, job.version)
+
+        def write():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed into place, so a crash never leaves a partial report
+            temporary = path.with_suffix(".json.tmp")
+            temporary.write_text(json.dumps(job.to_dict()))
+            os.replace(temporary, path)
+
+        try:
+            await asyncio.get_event_loop().run_in_executor(None, write)
+        except OSError as e:
+            print(f"Could not persist report {job.id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": statuses,
+            "cache_hits": self.cache_hits
+        }
@@ -0,0 +1,118 @@
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import time
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend that is known to be failing"""
+
+class LatencyTracker:
+    """Rolling window of call latencies"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency at the given fraction (0-1), or None until enough samples exist"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+class CircuitBreaker:
+    """Stops calling a failing backend and probes it for recovery in the background.
+
+    After failure_threshold consecutive failures the breaker opens and every
+    call fails fast with CircuitOpenError. A background task then runs probe()
+    every reset_seconds and closes the breaker on the first success.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(
+        self,
+        probe: Callable[[], Awaitable[Any]],
+        failure_threshold: int = 5,
+        reset_seconds: float = 30
+    ):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def check(self):
+        if self.state == self.OPEN:
+            self.rejected += 1
+            raise CircuitOpenError("LLM backend unavailable, circuit open")
+
+    def record_success(self):
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            print(f"LLM circuit opened after {self.consecutive_failures} consecutive failures")
+            self._probe_task = asyncio.ensure_future(self._probe_until_recovered())
+
+    async def _probe_until_recovered(self):
+        while self.state == self.OPEN:
+            await asyncio.sleep(self.reset_seconds)
+            try:
+                await self.probe()
+            except Exception as e:
+                print(f"LLM recovery probe failed: {e}")
+                continue
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            print("LLM circuit closed, backend recovered")
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.opened_at else 0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+async def hedged(call: Callable[[], Awaitable[Any]], hedge_after: Optional[float]) -> Any:
+    """Run call(), starting one duplicate if it has not finished after hedge_after seconds.
+
+    The first attempt to succeed wins and the other is cancelled. The call
+    only fails if every attempt fails.
+    """
+    primary = asyncio.ensure_future(call())
+    if hedge_after is None:
+        return await primary
+
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_after)
+        if not done:
+            pending.add(asyncio.ensure_future(call()))
+
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,217 @@
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import sys
+import time
+from ..config import Config
+from ..utils.serialization import dumps, loads
+from .state_store import StateStore, StoreError, get_store, store_key
+from .event_log import EventLog, get_event_log
+
+def approx_size(value: Any) -> int:
+    """Rough deep size in bytes of JSON-like data"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, deque)):
+        return sys.getsizeof(value) + sum(approx_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class RingBuffer(deque):
+    """Bounded deque that counts every item ever appended and tracks its approximate size"""
+
+    def __init__(self, iterable=(), maxlen: int = None):
+        super().__init__(iterable, maxlen)
+        self.total_appended = len(self)
+        self._sizes = deque((approx_size(item) for item in self), maxlen)
+        self.approx_bytes = sum(self._sizes)
+
+    def append(self, item):
+        if self.maxlen is not None and len(self) == self.maxlen and self._sizes:
+            self.approx_bytes -= self._sizes[0]
+        size = approx_size(item)
+        super().append(item)
+        self._sizes.append(size)
+        self.approx_bytes += size
+        self.total_appended += 1
+
+    def __reduce__(self):
+        return (self.__class__, (list(self), self.maxlen), self.__dict__)
+
+class SessionStore:
+    """Per-interview working state with bounded history and idle eviction.
+
+    Each session keeps its conversation, code submissions, hints and metrics
+    in ring buffers, so one long interview cannot grow without limit.
+    Sessions idle for longer than the TTL are evicted by a background sweep
+    unless is_active says they still have a live connection, and end()
+    removes a finished interview at once. Eviction callbacks let other
+    services drop their per-interview state at the same time.
+
+    With a shared state store, appends made through append() are also
+    written to the store, and load() rebuilds a session from it, so a
+    candidate who reconnects to another worker keeps their history. The
+    local buffers are then a cache of the shared copy. Without one, appends
+    go to the local event log instead, and load() rebuilds a session from it
+    after a restart.
+    """
+
+    def __init__(
+        self,
+        idle_ttl_seconds: float = None,
+        is_active: Callable[[str], bool] = None,
+        store: StateStore = None,
+        event_log: EventLog = None
+    ):
+        self.idle_ttl_seconds = idle_ttl_seconds or Config.SESSION_IDLE_TTL_SECONDS
+        self.is_active = is_active or (lambda interview_id: False)
+        self.store = store or get_store()
+        self.event_log = event_log or get_event_log()
+        self._pending_writes: Set[asyncio.Task] = set()
+        self.limits = {
+            "conversation_history": Config.SESSION_MAX_HISTORY,
+            "code_submissions": Config.SESSION_MAX_SUBMISSIONS,
+            "hints_used": Config.SESSION_MAX_HINTS,
+            "performance_metrics": Config.SESSION_MAX_SUBMISSIONS
+        }
+        self._sessions: Dict[str, Dict[str, RingBuffer]] = {}
+        self._last_active: Dict[str, float] = {}
+        self.on_evict: List[Callable[[str], None]] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self.evicted_idle = 0
+        self.ended = 0
+
+    def get_or_create(self, interview_id: str) -> Dict[str, RingBuffer]:
+        session = self._sessions.get(interview_id)
+        if session is None:
+            session = {key: RingBuffer(maxlen=limit) for key, limit in self.limits.items()}
+            self._sessions[interview_id] = session
+        self._last_active[interview_id] = time.monotonic()
+        return session
+
+    def __getitem__(self, interview_id: str) -> Dict[str, RingBuffer]:
+        """Session for the interview, refreshing its idle timer and recreating it if evicted"""
+        return self.get_or_create(interview_id)
+
+    def get(self, interview_id: str) -> Optional[Dict[str, RingBuffer]]:
+        return self._sessions.get(interview_id)
+
+    def __contains__(self, interview_id: str) -> bool:
+        return interview_id in self._sessions
+
+    async def load(self, interview_id: str, refresh: bool = False) -> Dict[str, RingBuffer]:
+        """Session for the interview, reloaded from a shared store if missing locally or refresh is set"""
+        if self.store.shared and (refresh or interview_id not in self._sessions):
+            try:
+                session = {}
+                for key, limit in self.limits.items():
+                    items = await self.store.lrange(self._store_key(interview_id, key))
+                    session[key] = RingBuffer((loads(item) for item in items), maxlen=limit)
+                self._sessions[interview_id] = session
+            except StoreError as e:
+                print(f"Could not load session {interview_id}: {e}")
+        elif self.event_log is not None and interview_id not in self._sessions:
+            try:
+                state = await self.event_log.load(interview_id)
+            except (OSError, ValueError) as e:
+                print(f"Could not rebuild session {interview_id} from its event log: {e}")
+                state = None
+            if state:
+                self._sessions[interview_id] = {
+                    key: RingBuffer(state.get(key, []), maxlen=limit) for key, limit in self.limits.items()
+                }
+        return self.get_or_create(interview_id)
+
+    def append(self, interview_id: str, key: str, item: Dict[str, Any]):
+        """Record an entry in one of the session's buffers, writing it through to a shared store or the event log"""
+        self.get_or_create(interview_id)[key].append(item)
+        if self.event_log is not None and not self.store.shared:
+            self.event_log.append(interview_id, key, item, self.limits[key])
+        if self.store.shared:
+            self._write(self.store.append_capped(
+                self._store_key(interview_id, key),
+                dumps(item).decode(),
+                self.limits[key],
+                Config.STATE_SESSION_TTL_SECONDS
+            ))
+
+    def _write(self, operation):
+        # Writes are queued in order on the store connection; nothing waits on them
+        task = asyncio.ensure_future(operation)
+        self._pending_writes.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task: asyncio.Task):
+        self._pending_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Session write-through failed: {task.exception()}")
+
+    @staticmethod
+    def _store_key(interview_id: str, key: str) -> str:
+        return store_key("session", interview_id, key)
+
+    async def end(self, interview_id: str):
+        """Drop an interview's state, including any shared copy, once it is complete"""
+        if self._remove(interview_id):
+            self.ended += 1
+        if self.event_log is not None:
+            await self.event_log.delete(interview_id)
+        if self.store.shared:
+            try:
+                await self.store.delete(*(self._store_key(interview_id, key) for key in self.limits))
+            except StoreError as e:
+                print(f"Could not delete session {interview_id}: {e}")
+
+    def discard(self, interview_id: str):
+        """Drop only this process's copy of an interview's state"""
+        self._remove(interview_id)
+
+    def evict_idle(self) -> int:
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        idle = [
+            interview_id for interview_id, last_active in self._last_active.items()
+            if last_active < cutoff and not self.is_active(interview_id)
+        ]
+        for interview_id in idle:
+            self._remove(interview_id)
+        self.evicted_idle += len(idle)
+        return len(idle)
+
+    def _remove(self, interview_id: str) -> bool:
+        self._last_active.pop(interview_id, None)
+        if self.event_log is not None:
+            self.event_log.close(interview_id)
+        if self._sessions.pop(interview_id, None) is None:
+            return False
+        for callback in self.on_evict:
+            try:
+                callback(interview_id)
+            except Exception as e:
+                print(f"Session eviction callback error: {e}")
+        return True
+
+    def start_sweeper(self):
+        """Start the periodic idle sweep; needs a running event loop"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.ensure_future(self._sweep())
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(Config.SESSION_SWEEP_INTERVAL_SECONDS)
+            self.evict_idle()
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by all session buffers"""
+        return sum(
+            buffer.approx_bytes
+            for session in self._sessions.values()
+            for buffer in session.values()
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "approx_bytes": self.memory_bytes(),
+            "evicted_idle": self.evicted_idle,
+            "ended": self.ended,
+            "idle_ttl_seconds": self.idle_ttl_seconds
+        }
@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Collapses concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is running await the same task and receive its result or
+    exception. Cancelling one waiter does not cancel the shared work while
+    others still wait for it; once the last waiter is cancelled the work is
+    cancelled too, so nobody pays for a result no one will read.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, _Call] = {}
+        self.calls = 0
+        self.executions = 0
+        self.suppressed = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        call = self._in_flight.get(key)
+        if call is not None:
+            self.suppressed += 1
+        else:
+            self.executions += 1
+            call = _Call(asyncio.ensure_future(fn()))
+            self._in_flight[key] = call
+            call.task.add_done_callback(lambda t: self._finish(key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+                self.abandoned += 1
+                # Later callers start afresh rather than join the cancelled work
+                if self._in_flight.get(key) is call:
+                    del self._in_flight[key]
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _finish(self, key: str, call: _Call):
+        if self._in_flight.get(key) is call:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def get_stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "suppressed": self.suppressed,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._in_flight)
+        }
@@ -0,0 +1,106 @@
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+from ..config import Config
+from .rate_limiter import Priority, llm_priority
+
+class SpeculativeResults:
+    """Hints and follow-up questions generated ahead of the request.
+
+    Results are either generated in the background or stored from a combined
+    LLM call, and are kept per interview and tied to the fingerprint of the
+    code they were generated for. Starting speculation for new code, or
+    asking for a result with different code, cancels whatever was pending.
+    """
+
+    def __init__(self, max_concurrency: int = None):
+        self._semaphore = asyncio.Semaphore(max_concurrency or Config.SPECULATIVE_MAX_CONCURRENCY)
+        # interview_id -> {"fingerprint": str, "tasks": {kind: Task}, "running": set of kinds}
+        self._entries: Dict[str, Dict] = {}
+        self.started = 0
+        self.stored = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+
+    def start(self, interview_id: str, fingerprint: str, jobs: Dict[str, Callable[[], Awaitable[str]]]):
+        """Begin generating each job's result for this code version in the background"""
+        self.cancel(interview_id)
+        entry = {"fingerprint": fingerprint, "tasks": {}, "running": set()}
+        for kind, job in jobs.items():
+            entry["tasks"][kind] = asyncio.ensure_future(self._run(entry, kind, job))
+            self.started += 1
+        self._entries[interview_id] = entry
+
+    def store(self, interview_id: str, fingerprint: str, results: Dict[str, str]):
+        """Keep results that were already generated for this code version"""
+        self.cancel(interview_id)
+        loop = asyncio.get_event_loop()
+        entry = {"fingerprint": fingerprint, "tasks": {}, "running": set(results)}
+        for kind, text in results.items():
+            future = loop.create_future()
+            future.set_result(text)
+            entry["tasks"][kind] = future
+            self.stored += 1
+        if entry["tasks"]:
+            self._entries[interview_id] = entry
+
+    async def _run(self, entry: Dict, kind: str, job: Callable[[], Awaitable[str]]) -> str:
+        # Speculative work waits behind a small pool and yields rate-limit budget
+        # to live requests, so it never crowds them out
+        llm_priority.set(Priority.SPECULATIVE)
+        async with self._semaphore:
+            entry["running"].add(kind)
+            return await job()
+
+    async def take(self, interview_id: str, fingerprint: str, kind: str) -> Optional[str]:
+        """Return the speculated result for this code, or None if there is none to use"""
+        entry = self._entries.get(interview_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry["fingerprint"] != fingerprint:
+            # The code changed since the analysis; the speculation is stale
+            self.cancel(interview_id)
+            self.misses += 1
+            return None
+
+        task = entry["tasks"].pop(kind, None)
+        if not entry["tasks"]:
+            del self._entries[interview_id]
+        if task is None:
+            self.misses += 1
+            return None
+        if not task.done() and kind not in entry["running"]:
+            # Still queued behind other speculation; a live call will be faster
+            task.cancel()
+            self.cancelled += 1
+            self.misses += 1
+            return None
+
+        try:
+            result = await task
+        except (asyncio.CancelledError, Exception):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def cancel(self, interview_id: str):
+        entry = self._entries.pop(interview_id, None)
+        if entry is None:
+            return
+        for task in entry["tasks"].values():
+            if not task.done():
+                task.cancel()
+                self.cancelled += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": Config.SPECULATIVE_PRECOMPUTE,
+            "pending_interviews": len(self._entries),
+            "started": self.started,
+            "stored": self.stored,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cancelled": self.cancelled
+        }
@@ -0,0 +1,256 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import sqlite3
+import time
+from ..config import Config
+from ..models.interview import DifficultyLevel, Interview, InterviewStatus
+from ..utils.serialization import dumps, loads
+from .interview_query import (
+    InterviewFilter, decode_cursor, encode_cursor, needs_record, project, summarize
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interviews (
+    id TEXT PRIMARY KEY,
+    candidate_name TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    category TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS interviews_created ON interviews (created_at, id);
+CREATE INDEX IF NOT EXISTS interviews_status ON interviews (status, created_at, id);
+CREATE INDEX IF NOT EXISTS interviews_difficulty ON interviews (difficulty, created_at, id);
+CREATE INDEX IF NOT EXISTS interviews_candidate ON interviews (candidate_name, created_at, id);
+"""
+
+UPSERT = """
+INSERT INTO interviews (id, candidate_name, difficulty, category, status, created_at, updated_at, data, summary)
+VALUES (:id, :candidate_name, :difficulty, :category, :status, :created_at, :updated_at, :data, :summary)
+ON CONFLICT (id) DO UPDATE SET
+    candidate_name = excluded.candidate_name,
+    difficulty = excluded.difficulty,
+    category = excluded.category,
+    status = excluded.status,
+    created_at = excluded.created_at,
+    updated_at = excluded.updated_at,
+    data = excluded.data,
+    summary = excluded.summary
+"""
+
+class SQLiteInterviewRepository:
+    """Interview records in an embedded SQLite database in WAL mode.
+
+    save() updates an in-memory LRU cache of hot interviews and queues the
+    row; a background flush writes queued rows in one transaction every
+    INTERVIEW_FLUSH_INTERVAL_MS, so requests never wait on disk. Repeated
+    saves of an interview before a flush collapse into one write. Listing
+    pages are keyset queries on indexed columns, reading the stored summary
+    unless other fields are requested. All
+    SQLite work runs on dedicated threads, one writer and one reader, which
+    WAL lets proceed side by side.
+
+    Rows are local to this machine; with several workers behind a shared
+    state store use INTERVIEW_BACKEND=store instead.
+    """
+
+    def __init__(self, path: str = None, cache_size: int = None):
+        self.path = Path(path or Config.INTERVIEW_DB_PATH)
+        self.cache_size = cache_size or Config.INTERVIEW_CACHE_SIZE
+        self.flush_interval = Config.INTERVIEW_FLUSH_INTERVAL_MS / 1000
+        self.batch_size = Config.INTERVIEW_FLUSH_BATCH_SIZE
+        self._cache: "OrderedDict[str, Interview]" = OrderedDict()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Rows handed to the writer but not yet committed
+        self._flushing: Dict[str, Dict[str, Any]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._batch_flush: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="interview-db-writer")
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="interview-db-reader")
+        self._write_connection: Optional[sqlite3.Connection] = None
+        self._read_connection: Optional[sqlite3.Connection] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.batches = 0
+        self.rows_written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Each connection is only ever used from its own executor thread
+        connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        if self._write_connection is None:
+            self._write_connection = self._connect()
+            self._write_connection.executescript(SCHEMA)
+            columns = {row[1] for row in self._write_connection.execute("PRAGMA table_info(interviews)")}
+            if "summary" not in columns:
+                # Databases created before listing summaries were stored
+                self._write_connection.execute("ALTER TABLE interviews ADD COLUMN summary TEXT")
+        return self._write_connection
+
+    def _reader_connection(self) -> sqlite3.Connection:
+        if self._read_connection is None:
+            # The writer creates the schema before the first read
+            self._writer.submit(self._writer_connection).result()
+            self._read_connection = self._connect()
+        return self._read_connection
+
+    async def _read(self, sql: str, params: tuple = ()) -> List[tuple]:
+        def query():
+            return self._reader_connection().execute(sql, params).fetchall()
+        return await asyncio.get_event_loop().run_in_executor(self._reader, query)
+
+    def _remember(self, interview: Interview):
+        self._cache[interview.id] = interview
+        self._cache.move_to_end(interview.id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def get(self, interview_id: str) -> Optional[Interview]:
+        """Interview by id; top-level changes to the returned copy need save() to take effect"""
+        interview = self._cache.get(interview_id)
+        if interview is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(interview_id)
+            return interview.model_copy()
+        self.cache_misses += 1
+        pending = self._pending.get(interview_id) or self._flushing.get(interview_id)
+        if pending is not None:
+            data = pending["data"]
+        else:
+            rows = await self._read("SELECT data FROM interviews WHERE id = ?", (interview_id,))
+            if not rows:
+                return None
+            data = rows[0][0]
+        interview = Interview.model_validate_json(data)
+        self._remember(interview)
+        return interview.model_copy()
+
+    async def save(self, interview: Interview):
+        """Cache the interview and queue it for the next batched write"""
+        self._remember(interview.model_copy())
+        self._pending[interview.id] = {
+            "id": interview.id,
+            "candidate_name": interview.candidate_name,
+            "difficulty": DifficultyLevel(interview.difficulty).value,
+            "category": interview.category,
+            "status": InterviewStatus(interview.status).value,
+            "created_at": interview.created_at.isoformat(),
+            "updated_at": time.time(),
+            "data": interview.model_dump_json(),
+            "summary": dumps(summarize(interview)).decode()
+        }
+        if len(self._pending) >= self.batch_size and (self._batch_flush is None or self._batch_flush.done()):
+            # A full batch goes out now instead of waiting for the interval
+            self._batch_flush = asyncio.ensure_future(self.flush())
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        """Write every queued row in one transaction"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+            rows = list(batch.values())
+
+            def write():
+                connection = self._writer_connection()
+                with connection:
+                    connection.execute("BEGIN")
+                    connection.executemany(UPSERT, rows)
+
+            try:
+                await asyncio.get_event_loop().run_in_executor(self._writer, write)
+            except sqlite3.Error as e:
+                print(f"Interview write failed: {e}")
+                # Keep the rows for the next flush unless newer saves replaced them
+                self._pending = {**batch, **self._pending}
+                return
+            finally:
+                self._flushing = {}
+            self.batches += 1
+            self.rows_written += len(rows)
+
+    async def list(self) -> List[Interview]:
+        await self.flush()
+        rows = await self._read("SELECT data FROM interviews ORDER BY created_at, id")
+        return [Interview.model_validate_json(data) for (data,) in rows]
+
+    async def list_page(
+        self,
+        filters: InterviewFilter,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of interviews, newest first, and the cursor for the next page"""
+        after = decode_cursor(cursor)
+        conditions, params = [], []
+        for column, value in (
+            ("status", filters.status),
+            ("difficulty", filters.difficulty),
+            ("candidate_name", filters.candidate)
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if filters.created_after is not None:
+            conditions.append("created_at >= ?")
+            params.append(filters.created_after.isoformat())
+        if filters.created_before is not None:
+            conditions.append("created_at < ?")
+            params.append(filters.created_before.isoformat())
+        if after is not None:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        column = "data" if needs_record(fields) else "COALESCE(summary, data)"
+
+        await self.flush()
+        rows = await self._read(
+            f"SELECT created_at, id, {column} FROM interviews {where} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit + 1)
+        )
+        page = [project(loads(record), fields) for _, _, record in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+        return page, next_cursor
+
+    async def aclose(self):
+        """Flush queued writes and close the database"""
+        await self.flush()
+        for executor, connection in ((self._writer, self._write_connection), (self._reader, self._read_connection)):
+            if connection is not None:
+                await asyncio.get_event_loop().run_in_executor(executor, connection.close)
+        self._write_connection = self._read_connection = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "cached": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "pending_writes": len(self._pending),
+            "batches": self.batches,
+            "rows_written": self.rows_written
+        }
@@ -0,0 +1,459 @@
+"""Shared key-value state and pub/sub for running several workers or nodes.
+
+STATE_BACKEND=memory keeps everything in process, which is only correct
+with a single uvicorn worker. STATE_BACKEND=redis talks the Redis protocol
+(RESP) to REDIS_URL, so interviews, session history and WebSocket events are
+shared by every worker that points at the same server.
+"""
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+import asyncio
+import bisect
+import time
+from ..config import Config
+
+# Receives each message published on a subscribed channel
+MessageCallback = Callable[[str], Awaitable[None]]
+
+def store_key(*parts: str) -> str:
+    """Namespaced key or channel name, so several deployments can share a server"""
+    return Config.STATE_KEY_PREFIX + ":".join(parts)
+
+class StoreError(Exception):
+    """The state store rejected a command or could not be reached"""
+
+class StateStore:
+    """Async key-value, set, list and pub/sub operations used for shared state"""
+
+    name = "base"
+    # Whether other processes see the same data
+    shared = False
+
+    def __init__(self):
+        self._subscriptions: Dict[str, List[MessageCallback]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl_seconds: float = None):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+    async def incr(self, key: str, ttl_seconds: float = None) -> int:
+        """Atomically add one to a counter and return the new value"""
+        raise NotImplementedError
+
+    async def sadd(self, key: str, member: str):
+        raise NotImplementedError
+
+    async def srem(self, key: str, member: str):
+        raise NotImplementedError
+
+    async def smembers(self, key: str) -> Set[str]:
+        raise NotImplementedError
+
+    async def append_capped(self, key: str, value: str, maxlen: int, ttl_seconds: float = None):
+        """Append to a list, keeping only its last maxlen items"""
+        raise NotImplementedError
+
+    async def lrange(self, key: str) -> List[str]:
+        raise NotImplementedError
+
+    async def zadd(self, key: str, member: str, score: float):
+        """Add or re-score a member of a sorted set"""
+        raise NotImplementedError
+
+    async def zrem(self, key: str, member: str):
+        raise NotImplementedError
+
+    async def zrevrangebyscore(
+        self, key: str, max_score: float, min_score: float, offset: int, count: int
+    ) -> List[Tuple[str, float]]:
+        """(member, score) pairs with min_score <= score <= max_score, highest first, ties by member descending"""
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message: str):
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, callback: MessageCallback):
+        self._subscriptions.setdefault(channel, []).append(callback)
+
+    async def unsubscribe(self, channel: str, callback: MessageCallback):
+        callbacks = self._subscriptions.get(channel, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._subscriptions.pop(channel, None)
+
+    async def _deliver(self, channel: str, message: str):
+        for callback in list(self._subscriptions.get(channel, [])):
+            try:
+                await callback(message)
+            except Exception as e:
+                print(f"Pub/sub callback error on {channel}: {e}")
+
+    async def aclose(self):
+        pass
+
+# Writes between sweeps of expired keys in InMemoryStore
+PURGE_EVERY = 1024
+
+class InMemoryStore(StateStore):
+    """Process-local store for single-worker deployments and development"""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._values: Dict[str, str] = {}
+        self._sets: Dict[str, Set[str]] = {}
+        self._lists: Dict[str, deque] = {}
+        # Sorted sets as member -> score plus a list of (score, member) kept in order
+        self._zscores: Dict[str, Dict[str, float]] = {}
+        self._zsorted: Dict[str, List[Tuple[float, str]]] = {}
+        self._expires: Dict[str, float] = {}
+        self._writes = 0
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._forget(key)
+            return False
+        return True
+
+    def _forget(self, key: str):
+        self._values.pop(key, None)
+        self._sets.pop(key, None)
+        self._lists.pop(key, None)
+        self._zscores.pop(key, None)
+        self._zsorted.pop(key, None)
+        self._expires.pop(key, None)
+
+    def _expire(self, key: str, ttl_seconds: float = None):
+        if ttl_seconds:
+            self._expires[key] = time.monotonic() + ttl_seconds
+        else:
+            self._expires.pop(key, None)
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            # Expiry is otherwise lazy, so keys nobody reads again would stay forever
+            now = time.monotonic()
+            for expired in [k for k, expires in self._expires.items() if expires <= now]:
+                self._forget(expired)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._values.get(key) if self._alive(key) else None
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: str, ttl_seconds: float = None):
+        self._values[key] = value
+        self._expire(key, ttl_seconds)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._forget(key)
+
+    async def incr(self, key: str, ttl_seconds: float = None) -> int:
+        value = int(await self.get(key) or 0) + 1
+        await self.set(key, str(value), ttl_seconds)
+        return value
+
+    async def sadd(self, key: str, member: str):
+        self._sets.setdefault(key, set()).add(member)
+
+    async def srem(self, key: str, member: str):
+        self._sets.get(key, set()).discard(member)
+
+    async def smembers(self, key: str) -> Set[str]:
+        return set(self._sets.get(key, ())) if self._alive(key) else set()
+
+    async def append_capped(self, key: str, value: str, maxlen: int, ttl_seconds: float = None):
+        if not self._alive(key) or self._lists.get(key) is None or self._lists[key].maxlen != maxlen:
+            self._lists[key] = deque(self._lists.get(key, ()), maxlen)
+        self._lists[key].append(value)
+        self._expire(key, ttl_seconds)
+
+    async def lrange(self, key: str) -> List[str]:
+        return list(self._lists.get(key, ())) if self._alive(key) else []
+
+    async def zadd(self, key: str, member: str, score: float):
+        await self.zrem(key, member)
+        self._zscores.setdefault(key, {})[member] = score
+        bisect.insort(self._zsorted.setdefault(key, []), (score, member))
+
+    async def zrem(self, key: str, member: str):
+        score = self._zscores.get(key, {}).pop(member, None)
+        if score is not None:
+            entries = self._zsorted[key]
+            del entries[bisect.bisect_left(entries, (score, member))]
+
+    async def zrevrangebyscore(
+        self, key: str, max_score: float, min_score: float, offset: int, count: int
+    ) -> List[Tuple[str, float]]:
+        entries = self._zsorted.get(key, [])
+        end = bisect.bisect_right(entries, (max_score, chr(0x10FFFF)))
+        start = bisect.bisect_left(entries, (min_score, ""))
+        selected = entries[max(start, end - offset - count):max(start, end - offset)]
+        return [(member, score) for score, member in reversed(selected)]
+
+    async def publish(self, channel: str, message: str):
+        await self._deliver(channel, message)
+
+def _encode_command(*args) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    return b"".join(parts)
+
+async def _read_reply(reader: asyncio.StreamReader):
+    """One complete reply; error replies are returned as StoreError, so the rest of the stream stays in step"""
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        return StoreError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(count)]
+    raise StoreError(f"Unexpected reply from state store: {line!r}")
+
+def _check(reply):
+    if isinstance(reply, StoreError):
+        raise reply
+    return reply
+
+class RedisStore(StateStore):
+    """Redis-protocol store over plain asyncio streams.
+
+    Commands share one connection and run one at a time; related commands
+    go out together as one pipelined round trip, wrapped in MULTI/EXEC when
+    they must apply atomically. Each round trip has STATE_COMMAND_TIMEOUT_SECONDS
+    to complete, and if it fails, times out or is cancelled part way the
+    connection is dropped, since an unread reply would otherwise be taken
+    as the answer to the next command. Subscriptions use a second
+    connection whose reader task dispatches published messages and
+    reconnects, resubscribing every channel, if the connection drops.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str = None):
+        super().__init__()
+        parsed = urlparse(url or Config.REDIS_URL)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = Config.STATE_COMMAND_TIMEOUT_SECONDS
+        self._command_lock = asyncio.Lock()
+        self._connection: Optional[tuple] = None
+        self._sub_lock = asyncio.Lock()
+        self._sub_connection: Optional[tuple] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def _open(self, select_db: bool = True) -> tuple:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                writer.write(_encode_command("AUTH", self.password))
+                _check(await _read_reply(reader))
+            if select_db and self.db:
+                writer.write(_encode_command("SELECT", self.db))
+                _check(await _read_reply(reader))
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def execute(self, *args):
+        return (await self.pipeline([args]))[0]
+
+    async def pipeline(self, commands: List[tuple]) -> list:
+        """Send commands in one round trip and return their replies, raising the first error reply"""
+        async with self._command_lock:
+            try:
+                replies = await asyncio.wait_for(self._round_trip(commands), self.timeout)
+            except BaseException as e:
+                # Replies may still be on their way; never reuse the connection for another command
+                self._drop(self._connection)
+                self._connection = None
+                if isinstance(e, asyncio.TimeoutError):
+                    raise StoreError(f"State store did not answer within {self.timeout}s")
+                if isinstance(e, (OSError, asyncio.IncompleteReadError)):
+                    raise StoreError(f"State store unavailable: {e}")
+                raise
+        for reply in replies:
+            _check(reply)
+        return replies
+
+    async def _round_trip(self, commands: List[tuple]) -> list:
+        if self._connection is None:
+            self._connection = await self._open()
+        reader, writer = self._connection
+        writer.write(b"".join(_encode_command(*args) for args in commands))
+        await writer.drain()
+        return [await _read_reply(reader) for _ in commands]
+
+    async def transaction(self, *commands: tuple) -> list:
+        """Run commands atomically with MULTI/EXEC in one round trip and return their replies"""
+        replies = await self.pipeline([("MULTI",), *commands, ("EXEC",)])
+        if replies[-1] is None:
+            raise StoreError("State store transaction was aborted")
+        return [_check(reply) for reply in replies[-1]]
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.execute("GET", key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return await self.execute("MGET", *keys)
+
+    async def set(self, key: str, value: str, ttl_seconds: float = None):
+        if ttl_seconds:
+            await self.execute("SET", key, value, "PX", int(ttl_seconds * 1000))
+        else:
+            await self.execute("SET", key, value)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.execute("DEL", *keys)
+
+    async def incr(self, key: str, ttl_seconds: float = None) -> int:
+        if not ttl_seconds:
+            return await self.execute("INCR", key)
+        value, _ = await self.transaction(("INCR", key), ("PEXPIRE", key, int(ttl_seconds * 1000)))
+        return value
+
+    async def sadd(self, key: str, member: str):
+        await self.execute("SADD", key, member)
+
+    async def srem(self, key: str, member: str):
+        await self.execute("SREM", key, member)
+
+    async def smembers(self, key: str) -> Set[str]:
+        return set(await self.execute("SMEMBERS", key) or [])
+
+    async def append_capped(self, key: str, value: str, maxlen: int, ttl_seconds: float = None):
+        commands = [("RPUSH", key, value), ("LTRIM", key, -maxlen, -1)]
+        if ttl_seconds:
+            commands.append(("PEXPIRE", key, int(ttl_seconds * 1000)))
+        await self.transaction(*commands)
+
+    async def lrange(self, key: str) -> List[str]:
+        return await self.execute("LRANGE", key, 0, -1) or []
+
+    async def zadd(self, key: str, member: str, score: float):
+        await self.execute("ZADD", key, repr(score), member)
+
+    async def zrem(self, key: str, member: str):
+        await self.execute("ZREM", key, member)
+
+    async def zrevrangebyscore(
+        self, key: str, max_score: float, min_score: float, offset: int, count: int
+    ) -> List[Tuple[str, float]]:
+        reply = await self.execute(
+            "ZREVRANGEBYSCORE", key, repr(max_score), repr(min_score), "WITHSCORES", "LIMIT", offset, count
+        ) or []
+        return [(reply[i], float(reply[i + 1])) for i in range(0, len(reply), 2)]
+
+    async def publish(self, channel: str, message: str):
+        await self.execute("PUBLISH", channel, message)
+
+    async def subscribe(self, channel: str, callback: MessageCallback):
+        # Only recorded once the server accepted it, so a failed attempt is retried next time
+        if channel not in self._subscriptions:
+            await self._send_subscription("SUBSCRIBE", channel)
+        await super().subscribe(channel, callback)
+
+    async def unsubscribe(self, channel: str, callback: MessageCallback):
+        await super().unsubscribe(channel, callback)
+        if channel not in self._subscriptions:
+            await self._send_subscription("UNSUBSCRIBE", channel)
+
+    async def _send_subscription(self, command: str, channel: str):
+        async with self._sub_lock:
+            try:
+                if self._sub_connection is None:
+                    if command == "UNSUBSCRIBE":
+                        return
+                    # Pub/sub channels are global, so the subscriber skips SELECT
+                    self._sub_connection = await asyncio.wait_for(self._open(select_db=False), self.timeout)
+                    self._listener = asyncio.ensure_future(self._listen(self._sub_connection))
+                _, writer = self._sub_connection
+                writer.write(_encode_command(command, channel))
+                await asyncio.wait_for(writer.drain(), self.timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                # A dropped subscriber connection is reopened by its listener
+                raise StoreError(f"State store unavailable: {e}")
+
+    async def _listen(self, connection: tuple):
+        reader = connection[0]
+        while True:
+            try:
+                reply = await _read_reply(reader)
+            except (OSError, asyncio.IncompleteReadError, StoreError) as e:
+                print(f"State store subscription lost: {e}")
+                connection = await self._resubscribe()
+                reader = connection[0]
+                continue
+            if isinstance(reply, list) and len(reply) == 3 and reply[0] == "message":
+                await self._deliver(reply[1], reply[2])
+
+    async def _resubscribe(self) -> tuple:
+        while True:
+            await asyncio.sleep(1)
+            try:
+                async with self._sub_lock:
+                    self._drop(self._sub_connection)
+                    self._sub_connection = None
+                    self._sub_connection = await asyncio.wait_for(self._open(select_db=False), self.timeout)
+                    if self._subscriptions:
+                        _, writer = self._sub_connection
+                        writer.write(_encode_command("SUBSCRIBE", *self._subscriptions))
+                        await writer.drain()
+                    return self._sub_connection
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, StoreError) as e:
+                print(f"State store reconnect failed: {e}")
+
+    @staticmethod
+    def _drop(connection: Optional[tuple]):
+        if connection is not None:
+            connection[1].close()
+
+    async def aclose(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        self._drop(self._connection)
+        self._drop(self._sub_connection)
+        self._connection = self._sub_connection = None
+
+_store: Optional[StateStore] = None
+
+def get_store() -> StateStore:
+    """Process-wide store selected by STATE_BACKEND"""
+    global _store
+    if _store is None:
+        _store = RedisStore() if Config.STATE_BACKEND == "redis" else InMemoryStore()
+    return _store
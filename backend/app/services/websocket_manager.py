@@ -1,100 +1,390 @@
 from fastapi import WebSocket
-from typing import Dict, List
-import json
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import time
+import uuid
 from datetime import datetime
+from ..config import Config
+from ..utils.serialization import dumps, loads
 from .gemini_service import GeminiInterviewer
 from .code_analysis import CodeAnalysisService
+from .hint_cache import code_fingerprint
+from .speculation import SpeculativeResults
+from .report_jobs import ReportJobManager
+from .session_store import SessionStore
+from .connection import Connection, Reply, COALESCE_KEYS
+from .replay import ReplayLog
+from .wire_format import negotiate
+from .code_document import CodeDocuments, PatchError, StaleVersionError
+from .state_store import StoreError, get_store, store_key
+
+# Replies mirrored to every other socket on the interview, so observers can follow live
+OBSERVED_EVENTS = {
+    "code_analysis", "chat_message", "hint_response", "follow_up_question",
+    "ai_response_delta", "ai_response_done", "report_progress", "performance_report"
+}
+
+# Events numbered and kept for clients that reconnect; intermediate ones are not worth replaying
+REPLAYED_EVENTS = {event for event in OBSERVED_EVENTS if event not in COALESCE_KEYS} | {"interview_ended"}
 
 class WebSocketManager:
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Dict[str, List[Connection]] = {}
         self.gemini_service = GeminiInterviewer()
         self.analysis_service = CodeAnalysisService()
-        self.interview_data = {}
+        self.speculation = SpeculativeResults()
+        self.report_jobs = ReportJobManager(self.gemini_service)
+        self.interview_data = SessionStore(
+            is_active=lambda interview_id: bool(self.active_connections.get(interview_id))
+        )
+        self.interview_data.on_evict.append(self.speculation.cancel)
+        self.interview_data.on_evict.append(self.gemini_service.forget)
+        # Editor contents kept in step with the client through code_sync and code_patch
+        self.code_documents = CodeDocuments()
+        self.interview_data.on_evict.append(self.code_documents.forget)
+        # Interview events travel over the store's pub/sub so every worker's sockets see them
+        self.store = get_store()
+        self.worker_id = uuid.uuid4().hex
+        self._subscriptions: Dict[str, Callable] = {}
+        self._pending_publishes: Set[asyncio.Task] = set()
+        self.replay = ReplayLog()
+        self._reaper: Optional[asyncio.Task] = None
+        self.opened = 0
+        self.closed = 0
+        self.reaped = {"dead": 0, "idle": 0}
     
-    async def connect(self, websocket: WebSocket, interview_id: str):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, interview_id: str, last_seq: Optional[int] = None) -> Connection:
+        """Register a socket; with last_seq, first send it the events it missed since then"""
+        # Clients offering no known subprotocol get JSON text frames
+        wire_format = negotiate(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=wire_format.subprotocol if wire_format else None)
+        connection = Connection(websocket, interview_id, wire_format=wire_format)
+        connection.on_reply = self._route_reply
+        first = not self.active_connections.get(interview_id)
         if interview_id not in self.active_connections:
             self.active_connections[interview_id] = []
-        self.active_connections[interview_id].append(websocket)
-        
-        # Initialize interview data
-        if interview_id not in self.interview_data:
-            self.interview_data[interview_id] = {
-                "conversation_history": [],
-                "code_submissions": [],
-                "hints_used": [],
-                "performance_metrics": []
-            }
-    
-    def disconnect(self, websocket: WebSocket, interview_id: str):
-        if interview_id in self.active_connections:
-            self.active_connections[interview_id].remove(websocket)
-    
-    async def handle_message(self, websocket: WebSocket, interview_id: str, data: dict):
+        self.active_connections[interview_id].append(connection)
+        self.opened += 1
+        
+        try:
+            # Initialize interview data; another worker may have served this interview last
+            await self.interview_data.load(interview_id, refresh=first)
+            if first:
+                await self.code_documents.load(interview_id)
+            self.interview_data.start_sweeper()
+            self._start_reaper()
+            if interview_id not in self._subscriptions:
+                # Also retries a subscription that failed for an earlier socket
+                await self._subscribe(interview_id)
+            if last_seq is not None:
+                await self._resume(connection, last_seq)
+        except BaseException:
+            # The caller never gets the connection to disconnect, so undo the registration here
+            await self.disconnect(connection)
+            raise
+        return connection
+    
+    async def _resume(self, connection: Connection, last_seq: int):
+        # The socket is already registered, so live events queue up behind the replayed ones
+        try:
+            missed, complete, current = await self.replay.since(connection.interview_id, last_seq)
+        except StoreError as e:
+            print(f"Replay error: {e}")
+            missed, complete, current = [], False, None
+        resumed = {
+            "type": "resumed",
+            "last_seq": last_seq,
+            "current_seq": current,
+            "replayed": len(missed),
+            # False when older events were already dropped; the client should refetch state
+            "complete": complete,
+            # Numbering started again below last_seq; the client must forget the numbers it saw
+            "seq_reset": current is not None and last_seq > current
+        }
+        # After a reset the notice goes first, so the client accepts the renumbered events
+        connection.prepend([resumed] + missed if resumed["seq_reset"] else missed + [resumed])
+    
+    async def disconnect(self, connection: Connection):
+        """Forget a socket; safe to call more than once and from any exit path"""
+        connection.close()
+        interview_id = connection.interview_id
+        connections = self.active_connections.get(interview_id)
+        if connections and connection in connections:
+            connections.remove(connection)
+            self.closed += 1
+        if connections is not None and not connections:
+            del self.active_connections[interview_id]
+        if interview_id not in self.active_connections and interview_id in self._subscriptions:
+            callback = self._subscriptions.pop(interview_id)
+            try:
+                await self.store.unsubscribe(self._channel(interview_id), callback)
+            except StoreError as e:
+                print(f"Unsubscribe error: {e}")
+    
+    async def end_interview(self, interview_id: str):
+        """Release all per-interview state once an interview is complete"""
+        await self.interview_data.end(interview_id)
+        await self.code_documents.end(interview_id)
+        await self.publish(interview_id, {"type": "interview_ended", "interview_id": interview_id})
+    
+    @staticmethod
+    def _channel(interview_id: str) -> str:
+        return store_key("events", interview_id)
+    
+    async def publish(self, interview_id: str, event: Dict[str, Any]):
+        """Send an event to every socket on the interview, on any worker"""
+        event = await self._sequence(interview_id, event)
+        self._deliver_local(interview_id, event)
+        if self.store.shared:
+            await self._publish_remote(interview_id, event)
+    
+    def broadcast(self, interview_id: str, event: Dict[str, Any], exclude: Connection = None):
+        """Queue an event for every socket on the interview except exclude, without waiting on any of them"""
+        self._deliver_local(interview_id, event, exclude)
+        if self.store.shared:
+            # Tasks queue on the store connection in creation order, so events stay ordered
+            task = asyncio.ensure_future(self._publish_remote(interview_id, event))
+            self._pending_publishes.add(task)
+            task.add_done_callback(self._pending_publishes.discard)
+    
+    async def _route_reply(self, connection: Connection, event: Dict[str, Any]) -> Dict[str, Any]:
+        event = await self._sequence(connection.interview_id, event)
+        if event.get("type") in OBSERVED_EVENTS:
+            self.broadcast(connection.interview_id, event, exclude=connection)
+        return event
+    
+    async def _sequence(self, interview_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        if event.get("type") not in REPLAYED_EVENTS:
+            return event
+        try:
+            return await self.replay.append(interview_id, event)
+        except StoreError as e:
+            print(f"Replay log error: {e}")
+            return event
+    
+    def _deliver_local(self, interview_id: str, event: Dict[str, Any], exclude: Connection = None):
+        # Each socket has its own bounded outbox; a lagging one loses intermediate events, not others' time
+        for connection in list(self.active_connections.get(interview_id, [])):
+            if connection is not exclude:
+                connection.enqueue(event)
+    
+    async def _publish_remote(self, interview_id: str, event: Dict[str, Any]):
+        try:
+            await self.store.publish(
+                self._channel(interview_id), dumps({"origin": self.worker_id, "event": event}).decode()
+            )
+        except StoreError as e:
+            print(f"Publish error: {e}")
+    
+    async def _subscribe(self, interview_id: str):
+        async def deliver(message: str):
+            envelope = loads(message)
+            if envelope.get("origin") == self.worker_id:
+                return
+            event = envelope["event"]
+            if event.get("type") == "interview_ended":
+                # Ended elsewhere; drop this worker's cached copy too
+                self.interview_data.discard(interview_id)
+                self.code_documents.forget(interview_id)
+            self._deliver_local(interview_id, event)
+        
+        try:
+            await self.store.subscribe(self._channel(interview_id), deliver)
+        except StoreError as e:
+            print(f"Subscribe error: {e}")
+            return
+        if interview_id in self._subscriptions or interview_id not in self.active_connections:
+            # Another socket subscribed meanwhile, or every socket has already left
+            try:
+                await self.store.unsubscribe(self._channel(interview_id), deliver)
+            except StoreError as e:
+                print(f"Unsubscribe error: {e}")
+            return
+        self._subscriptions[interview_id] = deliver
+    
+    async def receive(self, connection: Connection, data: dict):
+        """Handle one frame from the client: heartbeats inline, everything else as a request task"""
+        connection.last_seen = time.monotonic()
+        message_type = data.get("type")
+        if message_type == "pong":
+            return
+        if message_type == "ping":
+            connection.enqueue({"type": "pong"})
+            return
+        connection.last_activity = connection.last_seen
+        if message_type in ("code_sync", "code_patch"):
+            # Applied in arrival order, so requests sent after a patch see its result
+            self._handle_code_update(connection, data)
+            return
+        connection.dispatch(self.handle_message, data)
+    
+    def _handle_code_update(self, connection: Connection, data: dict):
+        interview_id = connection.interview_id
+        current = self.code_documents.get(interview_id)
+        previous_text = current.text if current else None
+        try:
+            if data.get("type") == "code_sync":
+                document = self.code_documents.sync(
+                    interview_id, str(data.get("code", "")), data.get("version"), data.get("language")
+                )
+            else:
+                document = self.code_documents.patch(
+                    interview_id, data.get("base_version"), data.get("patches") or []
+                )
+            response = {"type": "code_ack", "version": document.version}
+            if document.text != previous_text:
+                # Hints and follow-ups speculated for the old code would only be discarded later
+                self.speculation.cancel(interview_id)
+        except (StaleVersionError, PatchError) as e:
+            # The client resends the whole document with code_sync
+            document = self.code_documents.get(interview_id)
+            response = {"type": "code_conflict", "version": document.version if document else 0, "message": str(e)}
+        if data.get("request_id") is not None:
+            response["request_id"] = str(data["request_id"])
+        connection.enqueue(response)
+    
+    async def _resolve_code(self, reply: Reply, interview_id: str, data: dict) -> Optional[str]:
+        """Code sent with the request, else the synced document; None after reporting a version conflict"""
+        if "code" in data:
+            return data["code"]
+        document = self.code_documents.get(interview_id)
+        if document is None:
+            return ""
+        version = data.get("version")
+        if version is not None and version != document.version:
+            await reply.send_json({"type": "code_conflict", "version": document.version, "source": data.get("type")})
+            return None
+        # Submissions share the document's string rather than each holding a copy
+        return document.text
+    
+    def _start_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.ensure_future(self._heartbeat())
+    
+    async def _heartbeat(self):
+        """Ping every socket and close ones that stopped answering or sat idle too long"""
+        while True:
+            await asyncio.sleep(Config.WS_PING_INTERVAL_SECONDS)
+            now = time.monotonic()
+            for connection in [c for group in self.active_connections.values() for c in group]:
+                if now - connection.last_seen > Config.WS_PING_TIMEOUT_SECONDS:
+                    # No frame at all, not even a pong: likely a half-open TCP connection
+                    await self._reap(connection, "dead", 1001)
+                elif Config.WS_IDLE_TIMEOUT_SECONDS and now - connection.last_activity > Config.WS_IDLE_TIMEOUT_SECONDS:
+                    await self._reap(connection, "idle", 1000)
+                else:
+                    connection.enqueue({"type": "ping", "ts": datetime.now().isoformat()})
+    
+    async def _reap(self, connection: Connection, reason: str, code: int):
+        self.reaped[reason] += 1
+        connection.abort(code)
+        await self.disconnect(connection)
+    
+    async def handle_message(self, reply: Reply, interview_id: str, data: dict):
         message_type = data.get("type")
         
         if message_type == "analyze_code":
-            await self._handle_code_analysis(websocket, interview_id, data)
+            await self._handle_code_analysis(reply, interview_id, data)
         elif message_type == "send_message":
-            await self._handle_chat_message(websocket, interview_id, data)
+            await self._handle_chat_message(reply, interview_id, data)
         elif message_type == "request_hint":
-            await self._handle_hint_request(websocket, interview_id, data)
+            await self._handle_hint_request(reply, interview_id, data)
         elif message_type == "request_follow_up":
-            await self._handle_follow_up_request(websocket, interview_id, data)
+            await self._handle_follow_up_request(reply, interview_id, data)
         elif message_type == "generate_report":
-            await self._handle_report_generation(websocket, interview_id, data)
+            await self._handle_report_generation(reply, interview_id, data)
+        elif message_type == "report_status":
+            await self._handle_report_status(reply, interview_id, data)
+        elif message_type == "end_interview":
+            await self.end_interview(interview_id)
     
-    async def _handle_code_analysis(self, websocket: WebSocket, interview_id: str, data: dict):
-        code = data.get("code", "")
-        language = data.get("language", "python")
+    async def _handle_code_analysis(self, reply: Reply, interview_id: str, data: dict):
+        code = await self._resolve_code(reply, interview_id, data)
+        if code is None:
+            return
+        document = self.code_documents.get(interview_id)
+        language = data.get("language") or (document.language if document else "python")
         problem_description = data.get("problem_description", "")
         
         # Analyze code
         analysis = await self.analysis_service.analyze_code(code, language)
         
         # Store code submission
-        self.interview_data[interview_id]["code_submissions"].append({
+        self.interview_data.append(interview_id, "code_submissions", {
             "code": code,
             "language": language,
+            "question_id": data.get("question_id", ""),
+            "problem_description": problem_description,
             "analysis": analysis,
             "timestamp": datetime.now().isoformat()
         })
         
         # Generate AI response
         conversation_context = self.interview_data[interview_id]["conversation_history"]
-        ai_response = await self.gemini_service.generate_adaptive_response(
-            code=code,
-            analysis=analysis,
-            conversation_context=conversation_context,
-            problem_description=problem_description,
-            interview_id=interview_id
-        )
+        precomputed = {}
+        if Config.COMBINED_GENERATION:
+            # One structured call also yields the follow-up question and hint ladder
+            combined = await self.gemini_service.generate_combined_feedback(
+                code=code,
+                analysis=analysis,
+                conversation_context=conversation_context,
+                problem_description=problem_description,
+                interview_id=interview_id,
+                question_id=data.get("question_id", "")
+            )
+            ai_response = combined["feedback"]
+            if combined["follow_up_question"]:
+                precomputed["follow_up"] = combined["follow_up_question"]
+            for level, hint in enumerate(combined["hints"], start=1):
+                precomputed[f"hint_{level}"] = hint
+        else:
+            ai_response = await self.gemini_service.generate_adaptive_response(
+                code=code,
+                analysis=analysis,
+                conversation_context=conversation_context,
+                problem_description=problem_description,
+                interview_id=interview_id,
+                on_chunk=self._stream_deltas(reply, "code_analysis")
+            )
+        await self._send_response_done(reply, "code_analysis", ai_response)
         
         # Store conversation
-        self.interview_data[interview_id]["conversation_history"].append({
+        self.interview_data.append(interview_id, "conversation_history", {
             "role": "user",
             "content": f"Code submission: {code[:100]}...",
             "timestamp": datetime.now().isoformat()
         })
-        self.interview_data[interview_id]["conversation_history"].append({
+        self.interview_data.append(interview_id, "conversation_history", {
             "role": "assistant",
             "content": ai_response,
             "timestamp": datetime.now().isoformat()
         })
         
         # Send response
-        await websocket.send_json({
+        await reply.send_json({
             "type": "code_analysis",
             "analysis": analysis,
             "ai_response": ai_response
         })
+        
+        # The next request is usually a hint or follow-up on this same code
+        if precomputed:
+            self.speculation.store(interview_id, self._code_version(code, data), precomputed)
+        elif Config.SPECULATIVE_PRECOMPUTE:
+            self.speculation.start(interview_id, self._code_version(code, data), {
+                "hint_1": lambda: self.gemini_service.generate_hint(
+                    code, problem_description, 1, interview_id, question_id=data.get("question_id", "")
+                ),
+                "follow_up": lambda: self.gemini_service.generate_follow_up_question(
+                    code, analysis, problem_description, interview_id
+                )
+            })
     
-    async def _handle_chat_message(self, websocket: WebSocket, interview_id: str, data: dict):
+    async def _handle_chat_message(self, reply: Reply, interview_id: str, data: dict):
         message = data.get("message", "")
         
         # Store user message
-        self.interview_data[interview_id]["conversation_history"].append({
+        self.interview_data.append(interview_id, "conversation_history", {
             "role": "user",
             "content": message,
             "timestamp": datetime.now().isoformat()
@@ -107,72 +397,211 @@ class WebSocketManager:
             analysis={},
             conversation_context=conversation_context,
             problem_description="",
-            interview_id=interview_id
+            interview_id=interview_id,
+            on_chunk=self._stream_deltas(reply, "chat_message")
         )
+        await self._send_response_done(reply, "chat_message", ai_response)
         
         # Store AI response
-        self.interview_data[interview_id]["conversation_history"].append({
+        self.interview_data.append(interview_id, "conversation_history", {
             "role": "assistant",
             "content": ai_response,
             "timestamp": datetime.now().isoformat()
         })
         
         # Send response
-        await websocket.send_json({
+        await reply.send_json({
             "type": "chat_message",
             "ai_response": ai_response
         })
     
-    async def _handle_hint_request(self, websocket: WebSocket, interview_id: str, data: dict):
-        code = data.get("code", "")
+    async def _handle_hint_request(self, reply: Reply, interview_id: str, data: dict):
+        code = await self._resolve_code(reply, interview_id, data)
+        if code is None:
+            return
         problem_description = data.get("problem_description", "")
         hint_level = data.get("hint_level", 1)
         
-        # Generate hint
-        hint = await self.gemini_service.generate_hint(code, problem_description, hint_level, interview_id)
+        # Generate hint, unless one was already precomputed for this code
+        started = time.monotonic()
+        hint = await self.speculation.take(
+            interview_id, self._code_version(code, data), f"hint_{hint_level}"
+        )
+        if hint is not None:
+            self.gemini_service.record_cached("hint", interview_id, started)
+        else:
+            hint = await self.gemini_service.generate_hint(
+                code, problem_description, hint_level, interview_id,
+                on_chunk=self._stream_deltas(reply, "hint_response"),
+                question_id=data.get("question_id", "")
+            )
+        await self._send_response_done(reply, "hint_response", hint)
         
         # Store hint usage
-        self.interview_data[interview_id]["hints_used"].append({
+        self.interview_data.append(interview_id, "hints_used", {
+            "question_id": data.get("question_id", ""),
+            "problem_description": problem_description,
             "hint_level": hint_level,
             "hint": hint,
             "timestamp": datetime.now().isoformat()
         })
         
         # Send response
-        await websocket.send_json({
+        await reply.send_json({
             "type": "hint_response",
             "hint": hint,
             "hint_level": hint_level
         })
     
-    async def _handle_follow_up_request(self, websocket: WebSocket, interview_id: str, data: dict):
-        code = data.get("code", "")
+    async def _handle_follow_up_request(self, reply: Reply, interview_id: str, data: dict):
+        code = await self._resolve_code(reply, interview_id, data)
+        if code is None:
+            return
         analysis = data.get("analysis", {})
         problem_description = data.get("problem_description", "")
         
-        # Generate follow-up question
-        question = await self.gemini_service.generate_follow_up_question(
-            code, analysis, problem_description, interview_id
+        # Generate follow-up question, unless one was already speculated for this code
+        started = time.monotonic()
+        question = await self.speculation.take(
+            interview_id, self._code_version(code, data), "follow_up"
         )
+        if question is not None:
+            self.gemini_service.record_cached("follow_up", interview_id, started)
+        else:
+            question = await self.gemini_service.generate_follow_up_question(
+                code, analysis, problem_description, interview_id,
+                on_chunk=self._stream_deltas(reply, "follow_up_question")
+            )
+        await self._send_response_done(reply, "follow_up_question", question)
         
         # Send response
-        await websocket.send_json({
+        await reply.send_json({
             "type": "follow_up_question",
             "question": question
         })
     
-    async def _handle_report_generation(self, websocket: WebSocket, interview_id: str, data: dict):
-        # Generate performance report
-        report = await self.gemini_service.generate_performance_report(
-            self.interview_data[interview_id], interview_id
-        )
+    async def _handle_report_generation(self, reply: Reply, interview_id: str, data: dict):
+        # Queue the report as a background job; progress and the result arrive as events
+        async def listener(event: dict):
+            await reply.send_json(event)
         
-        # Send response
-        await websocket.send_json({
-            "type": "performance_report",
-            "report": report
+        job = await self.report_jobs.submit(interview_id, self.interview_data[interview_id], listener)
+        if job.status != "completed":
+            await reply.send_json({
+                "type": "report_job",
+                "job_id": job.id,
+                "status": job.status
+            })
+    
+    async def _handle_report_status(self, reply: Reply, interview_id: str, data: dict):
+        # Lets a reconnected client collect a report requested on an earlier socket
+        job = self.report_jobs.get(data.get("job_id", ""))
+        if job is None or job.interview_id != interview_id:
+            await reply.send_json({"type": "report_job", "job_id": data.get("job_id"), "status": "not_found"})
+            return
+        
+        if job.status in ("completed", "failed"):
+            await reply.send_json({
+                "type": "performance_report",
+                "job_id": job.id,
+                "status": job.status,
+                "report": job.report
+            })
+            return
+        
+        async def listener(event: dict):
+            await reply.send_json(event)
+        
+        job.listeners.append(listener)
+        await reply.send_json({
+            "type": "report_job",
+            "job_id": job.id,
+            "status": job.status,
+            "stage": job.stage,
+            "progress": round(job.progress, 3)
+        })
+    
+    def _stream_deltas(self, reply: Reply, source: str):
+        """Build a callback that forwards streamed AI text as ai_response_delta events"""
+        async def on_chunk(delta: str):
+            await reply.send_json({
+                "type": "ai_response_delta",
+                "source": source,
+                "delta": delta
+            })
+        return on_chunk
+    
+    async def _send_response_done(self, reply: Reply, source: str, text: str):
+        """Send the complete AI text; clients should replace any streamed deltas with it"""
+        await reply.send_json({
+            "type": "ai_response_done",
+            "source": source,
+            "text": text
         })
     
+    @staticmethod
+    def _code_version(code: str, data: dict) -> str:
+        # Clients send question_id with every request but not always the problem
+        # text, so the id identifies the question whenever it is present
+        question = data.get("question_id") or data.get("problem_description", "")
+        return code_fingerprint(f"{question}\n{code}")
+    
+    def get_stats(self) -> dict:
+        connections = [c for group in self.active_connections.values() for c in group]
+        return {
+            "connections": len(connections),
+            "interviews_connected": len(self.active_connections),
+            "connections_opened": self.opened,
+            "connections_closed": self.closed,
+            "connections_reaped": self.reaped,
+            "in_flight_requests": sum(len(c.tasks) for c in connections),
+            "send_backlog": sum(c.backlog for c in connections),
+            "coalesced_events": sum(c.coalesced for c in connections),
+            "dropped_events": sum(c.dropped for c in connections),
+            "rejected_requests": sum(c.rejected for c in connections),
+            "wire_formats": self._count_formats(connections),
+            "bytes_sent": sum(c.bytes_sent for c in connections),
+            "replay": self.replay.get_stats(),
+            "code_documents": self.code_documents.get_stats(),
+            "speculation": self.speculation.get_stats(),
+            "report_jobs": self.report_jobs.get_stats(),
+            "sessions": self.interview_data.get_stats()
+        }
+    
+    @staticmethod
+    def _count_formats(connections: List[Connection]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for connection in connections:
+            counts[connection.wire_format.name] = counts.get(connection.wire_format.name, 0) + 1
+        return counts
+    
+    def render_prometheus(self) -> str:
+        """Socket gauges in the Prometheus text format"""
+        connections = [c for group in self.active_connections.values() for c in group]
+        lines = [
+            "# HELP codesage_ws_open_sockets WebSocket connections currently open.",
+            "# TYPE codesage_ws_open_sockets gauge",
+            f"codesage_ws_open_sockets {len(connections)}",
+            "# HELP codesage_ws_open_sockets_by_format Open WebSocket connections by negotiated message format.",
+            "# TYPE codesage_ws_open_sockets_by_format gauge",
+            *(f'codesage_ws_open_sockets_by_format{{format="{name}"}} {count}'
+              for name, count in sorted(self._count_formats(connections).items())),
+            "# HELP codesage_ws_interviews_connected Interviews with at least one open socket.",
+            "# TYPE codesage_ws_interviews_connected gauge",
+            f"codesage_ws_interviews_connected {len(self.active_connections)}",
+            "# HELP codesage_ws_send_backlog Events queued for sending across all sockets.",
+            "# TYPE codesage_ws_send_backlog gauge",
+            f"codesage_ws_send_backlog {sum(c.backlog for c in connections)}",
+            "# HELP codesage_ws_connections_total WebSocket connections opened and closed.",
+            "# TYPE codesage_ws_connections_total counter",
+            f'codesage_ws_connections_total{{event="opened"}} {self.opened}',
+            f'codesage_ws_connections_total{{event="closed"}} {self.closed}',
+            "# HELP codesage_ws_reaped_total Sockets closed by the server for being dead or idle.",
+            "# TYPE codesage_ws_reaped_total counter"
+        ]
+        lines.extend(f'codesage_ws_reaped_total{{reason="{reason}"}} {count}' for reason, count in self.reaped.items())
+        return "\n".join(lines) + "\n"
+    
     def get_interview_data(self, interview_id: str) -> dict:
         """Get interview data for reporting"""
-        return self.interview_data.get(interview_id, {})
+        return self.interview_data.get(interview_id) or {}
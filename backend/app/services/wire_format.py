@@ -0,0 +1,77 @@
+"""WebSocket message encodings, negotiated per connection.
+
+Clients that offer no subprotocol get JSON text frames, as before. A
+client can instead offer the codesage.msgpack subprotocol to exchange
+MessagePack binary frames, which are smaller and cheaper to encode for
+large analysis results; this needs the optional msgpack package and is
+only accepted when it is installed. Compression is separate and done by
+the server's permessage-deflate extension (WS_PER_MESSAGE_DEFLATE).
+"""
+from typing import Any, Dict, List, Optional, Union
+from ..config import Config
+from ..utils.serialization import dumps, loads
+
+class WireFormat:
+    name = "json"
+    # Sec-WebSocket-Protocol value that selects this format
+    subprotocol = "codesage.json"
+    binary = False
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        """UTF-8 frame payload; sent as a text frame unless the format is binary"""
+        return dumps(data)
+
+    def decode(self, frame: Union[str, bytes]) -> Dict[str, Any]:
+        """Parse one frame, raising ValueError if it is not an object in this format"""
+        data = loads(frame)
+        if not isinstance(data, dict):
+            raise ValueError("Message must be an object")
+        return data
+
+class MsgpackFormat(WireFormat):
+    name = "msgpack"
+    subprotocol = "codesage.msgpack"
+    binary = True
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        return self._msgpack.packb(data, use_bin_type=True, default=str)
+
+    def decode(self, frame: Union[str, bytes]) -> Dict[str, Any]:
+        if isinstance(frame, str):
+            # Text frames are still JSON, which is handy when debugging by hand
+            return super().decode(frame)
+        try:
+            data = self._msgpack.unpackb(frame, raw=False)
+        except Exception as e:
+            raise ValueError(f"Invalid MessagePack message: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("Message must be an object")
+        return data
+
+JSON = WireFormat()
+
+def _load_formats() -> Dict[str, WireFormat]:
+    formats = {JSON.subprotocol: JSON}
+    if "msgpack" in Config.WS_WIRE_FORMATS:
+        try:
+            msgpack_format = MsgpackFormat()
+            formats[msgpack_format.subprotocol] = msgpack_format
+        except ImportError:
+            print("msgpack is not installed; WebSocket clients will use JSON")
+    return formats
+
+_formats: Optional[Dict[str, WireFormat]] = None
+
+def negotiate(offered: List[str]) -> Optional[WireFormat]:
+    """First offered subprotocol this server supports, or None if the client offered none it knows"""
+    global _formats
+    if _formats is None:
+        _formats = _load_formats()
+    for subprotocol in offered:
+        if subprotocol in _formats:
+            return _formats[subprotocol]
+    return None
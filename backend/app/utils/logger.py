@@ -22,9 +22,9 @@ def log_code_analysis(interview_id: str, analysis_result: dict):
     """Log code analysis results"""
     logger.info(f"Code Analysis - Interview: {interview_id} - Score: {analysis_result.get('overall_score', 0)}")
 
-def log_ai_interaction(interview_id: str, interaction_type: str, response_length: int):
+def log_ai_interaction(interview_id: str, interaction_type: str, response_length: int, details: dict = None):
     """Log AI interactions"""
-    logger.info(f"AI Interaction - Interview: {interview_id} - Type: {interaction_type} - Response Length: {response_length}")
+    logger.info(f"AI Interaction - Interview: {interview_id} - Type: {interaction_type} - Response Length: {response_length} - Details: {details}")
 
 def log_error(error: Exception, context: str = ""):
     """Log errors"""
@@ -0,0 +1,43 @@
+"""Fast JSON encoding for API responses, WebSocket events and stored records.
+
+Plain JSON-like data goes through orjson. Response bodies that contain
+pydantic models are dumped by pydantic-core in one pass, using serializers
+built once per type, instead of converting models to dicts and re-encoding
+them with FastAPI's jsonable_encoder.
+"""
+from functools import lru_cache
+from typing import Any, Union
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """Validator and serializer for a type, built once"""
+    return TypeAdapter(tp)
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return type_adapter(type(value)).dump_python(value, mode="json")
+    return str(value)
+
+def dumps(data: Any) -> bytes:
+    """Compact UTF-8 JSON; datetimes become ISO strings and unknown types their str()"""
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+def loads(data: Union[str, bytes]) -> Any:
+    return orjson.loads(data)
+
+def dump_response(content: Any) -> bytes:
+    """JSON for a response body, which may contain pydantic models at any depth"""
+    return type_adapter(Any).dump_json(content)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core.
+
+    Returning one of these from a route also skips jsonable_encoder, which
+    FastAPI otherwise runs over every returned dict.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_response(content)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+JSON serialization benchmark for REST responses and WebSocket events.
+
+Compares the previous path, Interview.dict() followed by FastAPI's
+jsonable_encoder and json.dumps, with the current one in
+app/utils/serialization.py:
+
+    python benchmarks/serialization_bench.py --interviews 100 --iterations 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import timeit
+import warnings
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from app.models.interview import ConversationRecord, DifficultyLevel, Interview, InterviewStatus  # noqa: E402
+from app.services.question_bank import get_question_bank  # noqa: E402
+from app.services.code_analysis import CodeAnalysisService  # noqa: E402
+from app.utils.serialization import dump_response, dumps  # noqa: E402
+
+SAMPLE_CODE = """def two_sum(nums, target):
+    seen = {}
+    for i, num in enumerate(nums):
+        if target - num in seen:
+            return [seen[target - num], i]
+        seen[num] = i
+
+print(two_sum([2, 7, 11, 15], 9))
+"""
+
+def build_interviews(count: int) -> list:
+    questions = list(get_question_bank().candidates(DifficultyLevel.MEDIUM.value))
+    history = [
+        ConversationRecord(role="user" if i % 2 else "assistant", content="Let me explain my approach. " * 10,
+                           timestamp=datetime.now())
+        for i in range(20)
+    ]
+    return [
+        Interview(id=str(i), candidate_name=f"Candidate {i}", difficulty=DifficultyLevel.MEDIUM, category="all",
+                  questions=questions, status=InterviewStatus.IN_PROGRESS, created_at=datetime.now(),
+                  conversation_history=history)
+        for i in range(count)
+    ]
+
+def report(name: str, before, after, iterations: int):
+    before_time = timeit.timeit(before, number=iterations) / iterations
+    after_time = timeit.timeit(after, number=iterations) / iterations
+    print(f"{name:28s} before {before_time * 1e3:9.3f}ms  after {after_time * 1e3:9.3f}ms  "
+          f"({before_time / after_time:.1f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interviews", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    interviews = build_interviews(args.interviews)
+    report(
+        f"list_interviews (n={args.interviews})",
+        lambda: json.dumps(jsonable_encoder({"success": True, "interviews": [i.dict() for i in interviews]})),
+        lambda: dump_response({"success": True, "interviews": interviews}),
+        args.iterations
+    )
+    report(
+        "get_interview",
+        lambda: json.dumps(jsonable_encoder({"success": True, "interview": interviews[0].dict()})),
+        lambda: dump_response({"success": True, "interview": interviews[0]}),
+        args.iterations * 20
+    )
+
+    analysis = asyncio.run(CodeAnalysisService().analyze_code(SAMPLE_CODE, "python"))
+    event = {"type": "code_analysis", "analysis": analysis, "ai_response": "Good use of a hash map. " * 20,
+             "seq": 7, "request_id": "3"}
+    report(
+        "code_analysis event",
+        lambda: json.dumps(event, default=str),
+        lambda: dumps(event),
+        args.iterations * 200
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for WebSocket message formats.
+
+Encodes and decodes a typical code_analysis event, built from a real
+CodeAnalysisService result, in each available wire format and reports
+CPU time per message and frame size, raw and after permessage-deflate:
+
+    python benchmarks/wire_format_bench.py --iterations 5000
+
+MessagePack is measured only when the msgpack package is installed.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.code_analysis import CodeAnalysisService  # noqa: E402
+from app.services.wire_format import JSON, MsgpackFormat  # noqa: E402
+
+SAMPLE_CODE = """def two_sum(nums, target):
+    seen = {}
+    for i, num in enumerate(nums):
+        complement = target - num
+        if complement in seen:
+            return [seen[complement], i]
+        seen[num] = i
+    return []
+
+print(two_sum([2, 7, 11, 15], 9))
+"""
+
+AI_RESPONSE = (
+    "Nice work using a hash map here. Your solution runs in O(n) time and O(n) space. "
+    "Can you walk me through what happens when the same number appears twice, and how "
+    "you would adapt this if the input were sorted and memory were constrained? "
+) * 4
+
+def build_event(size: int) -> dict:
+    code = "\n".join([SAMPLE_CODE] * size)
+    analysis = asyncio.run(CodeAnalysisService().analyze_code(code, "python"))
+    return {"type": "code_analysis", "analysis": analysis, "ai_response": AI_RESPONSE,
+            "seq": 42, "request_id": "17"}
+
+def deflate_sizes(frames: list) -> tuple:
+    """Compressed size per message with a fresh context, and with context takeover across messages"""
+    fresh = []
+    for frame in frames:
+        compressor = zlib.compressobj(wbits=-15)
+        fresh.append(len(compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4)
+    shared = zlib.compressobj(wbits=-15)
+    takeover = [len(shared.compress(frame) + shared.flush(zlib.Z_SYNC_FLUSH)) - 4 for frame in frames]
+    return sum(fresh) / len(fresh), sum(takeover[1:]) / max(len(takeover) - 1, 1)
+
+def measure(wire_format, event: dict, iterations: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        frame = wire_format.encode(event)
+    encode_time = (time.perf_counter() - started) / iterations
+    started = time.perf_counter()
+    for _ in range(iterations):
+        wire_format.decode(frame)
+    decode_time = (time.perf_counter() - started) / iterations
+    raw = frame if isinstance(frame, bytes) else frame.encode()
+    # Successive events differ only in sequence numbers, as on a live socket
+    frames = []
+    for seq in range(20):
+        encoded = wire_format.encode({**event, "seq": seq})
+        frames.append(encoded if isinstance(encoded, bytes) else encoded.encode())
+    fresh, takeover = deflate_sizes(frames)
+    return {"encode_us": encode_time * 1e6, "decode_us": decode_time * 1e6, "bytes": len(raw),
+            "deflate": fresh, "deflate_takeover": takeover}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    formats = [JSON]
+    try:
+        formats.append(MsgpackFormat())
+    except ImportError:
+        print("msgpack not installed; measuring JSON only")
+
+    for size in (1, 10):
+        event = build_event(size)
+        print(f"\ncode_analysis event, {size}x sample code")
+        print(f"{'format':10s} {'encode':>10s} {'decode':>10s} {'bytes':>8s} {'deflate':>8s} {'ctx-takeover':>13s}")
+        for wire_format in formats:
+            result = measure(wire_format, event, args.iterations)
+            print(
+                f"{wire_format.name:10s} {result['encode_us']:8.1f}us {result['decode_us']:8.1f}us "
+                f"{result['bytes']:8d} {result['deflate']:8.0f} {result['deflate_takeover']:13.0f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+WebSocket load test for the interview flow.
+
+Start the API against the offline LLM stub, then run this script:
+
+    LLM_BACKEND=stub python -m uvicorn app.main:app --port 8000
+    python benchmarks/ws_load_test.py --interviews 50 --rounds 3
+
+Each simulated candidate submits code, asks for a hint and a follow-up
+question, and the script reports time-to-first-token and total latency
+percentiles per message type.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import websockets
+
+SAMPLE_CODE = """def two_sum(nums, target):
+    for i in range(len(nums)):
+        for j in range(i + 1, len(nums)):
+            if nums[i] + nums[j] == target:
+                return [i, j]
+"""
+
+REQUESTS = [
+    ("code_analysis", {"type": "analyze_code", "code": SAMPLE_CODE, "language": "python",
+                       "problem_description": "Two Sum"}),
+    ("hint_response", {"type": "request_hint", "code": SAMPLE_CODE, "question_id": "e1",
+                       "problem_description": "Two Sum", "hint_level": 1}),
+    ("follow_up_question", {"type": "request_follow_up", "code": SAMPLE_CODE, "analysis": {},
+                            "problem_description": "Two Sum"}),
+]
+
+async def run_candidate(url: str, rounds: int, results: dict):
+    async with websockets.connect(f"{url}/ws/{uuid.uuid4()}") as ws:
+        for _ in range(rounds):
+            for final_type, message in REQUESTS:
+                started = time.perf_counter()
+                first_token = None
+                await ws.send(json.dumps(message))
+                while True:
+                    event = json.loads(await ws.recv())
+                    if event.get("type") in ("ai_response_delta", "ai_response_done") and first_token is None:
+                        first_token = time.perf_counter() - started
+                    if event.get("type") == final_type:
+                        break
+                total = time.perf_counter() - started
+                results.setdefault(final_type, {"ttft": [], "total": []})
+                results[final_type]["ttft"].append(first_token or total)
+                results[final_type]["total"].append(total)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:8000")
+    parser.add_argument("--interviews", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args()
+
+    results = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(run_candidate(args.url, args.rounds, results) for _ in range(args.interviews)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.interviews} interviews x {args.rounds} rounds in {elapsed:.2f}s")
+    for message_type, timings in results.items():
+        print(
+            f"{message_type:20s} n={len(timings['total']):4d} "
+            f"ttft p50={statistics.median(timings['ttft']):.3f}s p95={percentile(timings['ttft'], 0.95):.3f}s  "
+            f"total p50={statistics.median(timings['total']):.3f}s p95={percentile(timings['total'], 0.95):.3f}s"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -95,6 +95,21 @@ const InterviewPage: React.FC = () => {
     }
   }, [interview, id]);
 
+  // Every event of one streamed reply carries the same stream_id
+  const messageId = (data: any) => (data.stream_id ? `stream-${data.stream_id}` : Date.now().toString());
+
+  const upsertMessage = (message: ConversationMessage) => {
+    setChatMessages(prev => {
+      const index = prev.findIndex(existing => existing.id === message.id);
+      if (index === -1) {
+        return [...prev, message];
+      }
+      const next = [...prev];
+      next[index] = message;
+      return next;
+    });
+  };
+
   // WebSocket connection
   const connectWebSocket = () => {
     if (!id) return;
@@ -102,6 +117,29 @@ const InterviewPage: React.FC = () => {
     websocketService.connect(id);
     setIsConnected(true);
 
+    // Streamed text fills a pending message that the complete reply replaces in place
+    websocketService.onMessage('ai_response_delta', (data) => {
+      const id = messageId(data);
+      setChatMessages(prev => {
+        const index = prev.findIndex(message => message.id === id);
+        if (index === -1) {
+          return [...prev, { id, role: 'assistant', content: data.delta, timestamp: new Date().toISOString() }];
+        }
+        const next = [...prev];
+        next[index] = { ...prev[index], content: prev[index].content + data.delta };
+        return next;
+      });
+    });
+
+    websocketService.onMessage('ai_response_done', (data) => {
+      upsertMessage({
+        id: messageId(data),
+        role: 'assistant',
+        content: data.text,
+        timestamp: new Date().toISOString()
+      });
+    });
+
     // Set up message handlers
     websocketService.onMessage('code_analysis', (data) => {
       setAnalysis(data.analysis);
@@ -109,43 +147,43 @@ const InterviewPage: React.FC = () => {
       
       // Add AI response to chat
       const aiMessage: ConversationMessage = {
-        id: Date.now().toString(),
+        id: messageId(data),
         role: 'assistant',
         content: data.ai_response,
         timestamp: new Date().toISOString()
       };
-      setChatMessages(prev => [...prev, aiMessage]);
+      upsertMessage(aiMessage);
     });
 
     websocketService.onMessage('chat_message', (data) => {
       const aiMessage: ConversationMessage = {
-        id: Date.now().toString(),
+        id: messageId(data),
         role: 'assistant',
         content: data.ai_response,
         timestamp: new Date().toISOString()
       };
-      setChatMessages(prev => [...prev, aiMessage]);
+      upsertMessage(aiMessage);
     });
 
     websocketService.onMessage('hint_response', (data) => {
       const hintMessage: ConversationMessage = {
-        id: Date.now().toString(),
+        id: messageId(data),
         role: 'assistant',
         content: `Hint ${data.hint_level}: ${data.hint}`,
         timestamp: new Date().toISOString()
       };
-      setChatMessages(prev => [...prev, hintMessage]);
+      upsertMessage(hintMessage);
       setCurrentHintLevel(data.hint_level);
     });
 
     websocketService.onMessage('follow_up_question', (data) => {
       const questionMessage: ConversationMessage = {
-        id: Date.now().toString(),
+        id: messageId(data),
         role: 'assistant',
         content: data.question,
         timestamp: new Date().toISOString()
       };
-      setChatMessages(prev => [...prev, questionMessage]);
+      upsertMessage(questionMessage);
     });
   };
 
@@ -199,7 +237,8 @@ const InterviewPage: React.FC = () => {
     websocketService.sendCodeAnalysis(
       code,
       language,
-      currentQuestion?.description || ''
+      currentQuestion?.description || '',
+      currentQuestion?.id || ''
     );
 
     // Simulate running state
@@ -29,8 +29,18 @@ export const interviewAPI = {
     return response.data;
   },
 
-  listInterviews: async () => {
-    const response = await api.get('/api/interviews');
+  // Returns one page; pass the response's next_cursor as cursor to get the next one
+  listInterviews: async (params: {
+    limit?: number;
+    cursor?: string;
+    status?: string;
+    difficulty?: string;
+    candidate?: string;
+    created_after?: string;
+    created_before?: string;
+    fields?: string;
+  } = {}) => {
+    const response = await api.get('/api/interviews', { params });
     return response.data;
   },
 };
@@ -5,14 +5,30 @@ class WebSocketService {
   private callbacks: Map<string, (data: any) => void> = new Map();
   private reconnectAttempts = 0;
   private maxReconnectAttempts = 5;
+  private nextRequestId = 1;
+  private interviewId: string | null = null;
+  private lastSeq = 0;
+  // Editor contents the server holds, and its version; null until the next full code_sync
+  private syncedCode: string | null = null;
+  private codeVersion = 0;
+  // Requests that referred to a code version, kept until answered in case the server rejects the version
+  private codeRequests: Map<string, any> = new Map();
 
   connect(interviewId: string) {
     try {
-      this.socket = new WebSocket(`ws://localhost:8000/ws/${interviewId}`);
+      if (this.interviewId !== interviewId) {
+        this.interviewId = interviewId;
+        this.lastSeq = 0;
+      }
+      // On reconnect, ask the server to replay the events we missed
+      const resume = this.lastSeq > 0 ? `?last_seq=${this.lastSeq}` : '';
+      this.socket = new WebSocket(`ws://localhost:8000/ws/${interviewId}${resume}`);
 
       this.socket.onopen = () => {
         console.log('Connected to interview session');
         this.reconnectAttempts = 0;
+        // The server may have lost the document; start again from a full copy
+        this.syncedCode = null;
       };
 
       this.socket.onclose = () => {
@@ -27,6 +43,16 @@ class WebSocketService {
       this.socket.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
+          if (data.type === 'resumed' && data.seq_reset) {
+            // The server's numbering started again; the numbers we saw no longer apply
+            this.lastSeq = 0;
+          }
+          if (typeof data.seq === 'number') {
+            if (data.seq <= this.lastSeq) {
+              return;
+            }
+            this.lastSeq = data.seq;
+          }
           this.handleMessage(data);
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
@@ -47,8 +73,22 @@ class WebSocketService {
 
   private handleMessage(data: any) {
     const { type, ...messageData } = data;
+    if (data.request_id && ['code_analysis', 'hint_response', 'follow_up_question', 'error'].includes(type)) {
+      this.codeRequests.delete(data.request_id);
+    }
     
     switch (type) {
+      case 'ping':
+        // Server heartbeat; answering keeps the connection from being reaped
+        this.socket?.send(JSON.stringify({ type: 'pong' }));
+        break;
+      case 'pong':
+        break;
+      case 'code_ack':
+        break;
+      case 'code_conflict':
+        this.handleCodeConflict(messageData);
+        break;
       case 'code_analysis':
         this.triggerCallback('code_analysis', messageData);
         break;
@@ -64,6 +104,21 @@ class WebSocketService {
       case 'performance_report':
         this.triggerCallback('performance_report', messageData);
         break;
+      case 'ai_response_delta':
+        this.triggerCallback('ai_response_delta', messageData);
+        break;
+      case 'ai_response_done':
+        this.triggerCallback('ai_response_done', messageData);
+        break;
+      case 'error':
+        this.triggerCallback('error', messageData);
+        break;
+      case 'interview_ended':
+        this.triggerCallback('interview_ended', messageData);
+        break;
+      case 'resumed':
+        this.triggerCallback('resumed', messageData);
+        break;
       default:
         console.log('Unknown message type:', type);
     }
@@ -76,22 +131,78 @@ class WebSocketService {
     }
   }
 
-  private send(data: any) {
+  private send(data: any): string | null {
     if (this.socket && this.socket.readyState === WebSocket.OPEN) {
-      this.socket.send(JSON.stringify(data));
+      // Requests run concurrently on the server; responses echo this id
+      const requestId = String(this.nextRequestId++);
+      this.socket.send(JSON.stringify({ request_id: requestId, ...data }));
+      return requestId;
+    }
+    console.warn('WebSocket not connected, cannot send message');
+    return null;
+  }
+
+  private syncCode(code: string, language?: string): boolean {
+    if (this.syncedCode === code) {
+      return true;
+    }
+    // Offsets are UTF-16 units here but code points on the server, so text with surrogate pairs goes whole
+    if (this.syncedCode === null || /[\uD800-\uDFFF]/.test(code + this.syncedCode)) {
+      if (!this.send({ type: 'code_sync', code, version: this.codeVersion + 1, language })) {
+        return false;
+      }
     } else {
-      console.warn('WebSocket not connected, cannot send message');
+      // One replacement of the span between the common prefix and common suffix
+      const previous = this.syncedCode;
+      let start = 0;
+      while (start < previous.length && start < code.length && previous[start] === code[start]) {
+        start++;
+      }
+      let previousEnd = previous.length;
+      let end = code.length;
+      while (previousEnd > start && end > start && previous[previousEnd - 1] === code[end - 1]) {
+        previousEnd--;
+        end--;
+      }
+      const patch = { start, end: previousEnd, text: code.slice(start, end) };
+      if (!this.send({ type: 'code_patch', base_version: this.codeVersion, patches: [patch] })) {
+        return false;
+      }
     }
+    this.codeVersion++;
+    this.syncedCode = code;
+    return true;
   }
 
-  sendCodeAnalysis(code: string, language: string, problemDescription: string = '') {
-    this.send({
+  private sendWithCode(data: any, code: string, language?: string) {
+    // Send the request against the synced document instead of carrying the whole file
+    if (!this.syncCode(code, language)) {
+      return;
+    }
+    const requestId = this.send({ ...data, version: this.codeVersion });
+    if (requestId) {
+      this.codeRequests.set(requestId, { data, code });
+    }
+  }
+
+  private handleCodeConflict(data: any) {
+    this.syncedCode = null;
+    const pending = data.request_id ? this.codeRequests.get(data.request_id) : undefined;
+    if (pending) {
+      // The server could not use our version; retry with the code inline
+      this.codeRequests.delete(data.request_id);
+      this.send({ ...pending.data, code: pending.code });
+    }
+  }
+
+  sendCodeAnalysis(code: string, language: string, problemDescription: string = '', questionId: string = '') {
+    this.sendWithCode({
       type: 'analyze_code',
-      code,
       language,
+      question_id: questionId,
       problem_description: problemDescription,
       timestamp: new Date().toISOString()
-    });
+    }, code, language);
   }
 
   sendMessage(message: string) {
@@ -103,23 +214,22 @@ class WebSocketService {
   }
 
   requestHint(questionId: string, hintLevel: number = 1, currentCode: string = '') {
-    this.send({
+    this.sendWithCode({
       type: 'request_hint',
       question_id: questionId,
       hint_level: hintLevel,
-      current_code: currentCode,
       timestamp: new Date().toISOString()
-    });
+    }, currentCode);
   }
 
-  requestFollowUp(code: string, analysis: any, problemDescription: string) {
-    this.send({
+  requestFollowUp(code: string, analysis: any, problemDescription: string, questionId: string = '') {
+    this.sendWithCode({
       type: 'request_follow_up',
-      code,
       analysis,
+      question_id: questionId,
       problem_description: problemDescription,
       timestamp: new Date().toISOString()
-    });
+    }, code);
   }
 
   generateReport() {